@@ -0,0 +1,115 @@
+import json
+import os
+import pygame
+from settings import *
+from telemetry import telemetry
+from startup import startup
+
+ATLAS_FOLDERS = [
+    'graphics/character',
+    'graphics/soil',
+    'graphics/soil_water',
+    'graphics/fruit',
+    'graphics/rain',
+    'graphics/water',
+    'graphics/overlay',
+]
+ATLAS_DIR = '.cache/atlas'
+ATLAS_PAGE_SIZE = 2048
+ATLAS_PADDING = 1
+MANIFEST_VERSION = 1
+
+
+def source_files():
+    files = []
+    for folder in ATLAS_FOLDERS:
+        for root, _, names in os.walk(folder):
+            files.extend(os.path.normpath(os.path.join(root, name)) for name in names if name.endswith('.png'))
+    return sorted(files)
+
+
+def source_stamps(files):
+    # a changed size or modification time on any source image invalidates the cached pages
+    stamps = {}
+    for path in files:
+        stat = os.stat(path)
+        stamps[path] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+def pack(sizes):
+    # shelf packing, tallest images first: returns path -> (page, x, y)
+    placements = {}
+    page, x, y, shelf_height = 0, 0, 0, 0
+    for path, (width, height) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if x + width > ATLAS_PAGE_SIZE:  # next shelf
+            x, y, shelf_height = 0, y + shelf_height + ATLAS_PADDING, 0
+        if y + height > ATLAS_PAGE_SIZE:  # next page
+            page, x, y, shelf_height = page + 1, 0, 0, 0
+        placements[path] = (page, x, y)
+        x += width + ATLAS_PADDING
+        shelf_height = max(shelf_height, height)
+    return placements
+
+
+class Atlas:
+    def __init__(self, directory=ATLAS_DIR):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.pages = []
+        self.entries = {}  # path -> (page, x, y, width, height)
+        self.subsurfaces = {}  # handed out once per path so every user shares the same surface
+        self.loaded = False
+
+    def load(self):
+        files = source_files()
+        stamps = source_stamps(files)
+        manifest = self.read_manifest()
+        if not manifest or manifest['version'] != MANIFEST_VERSION or manifest['sources'] != stamps:
+            manifest = self.build(files, stamps)
+        self.entries = {path: tuple(entry) for path, entry in manifest['entries'].items()}
+        self.pages = []
+        for index in range(manifest['pages']):
+            page_path = os.path.join(self.directory, f'page_{index}.png')
+            self.pages.append(telemetry.track(pygame.image.load(page_path).convert_alpha(), page_path))
+        self.loaded = True
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def build(self, files, stamps):
+        images = {path: pygame.image.load(path) for path in files}
+        placements = pack({path: image.get_size() for path, image in images.items()})
+        page_count = max((page for page, _, _ in placements.values()), default=-1) + 1
+        pages = [pygame.Surface((ATLAS_PAGE_SIZE, ATLAS_PAGE_SIZE), pygame.SRCALPHA) for _ in range(page_count)]
+        entries = {}
+        for path, (page, x, y) in placements.items():
+            pages[page].blit(images[path], (x, y))
+            entries[path] = [page, x, y, *images[path].get_size()]
+
+        os.makedirs(self.directory, exist_ok=True)
+        for index, page in enumerate(pages):
+            pygame.image.save(page, os.path.join(self.directory, f'page_{index}.png'))
+        manifest = {'version': MANIFEST_VERSION, 'pages': page_count, 'sources': stamps, 'entries': entries}
+        with open(self.manifest_path, 'w') as file:
+            json.dump(manifest, file)
+        return manifest
+
+    def get(self, path):
+        if not self.loaded:
+            with startup.phase('asset decode'):
+                self.load()  # needs the display mode set, the pages are converted to its format
+        path = os.path.normpath(path)
+        surface = self.subsurfaces.get(path)
+        if surface is None and path in self.entries:
+            page, x, y, width, height = self.entries[path]
+            surface = self.pages[page].subsurface((x, y, width, height))
+            self.subsurfaces[path] = surface
+        return surface
+
+
+atlas = Atlas()
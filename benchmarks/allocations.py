@@ -0,0 +1,77 @@
+import argparse
+import gc
+import sys
+import tracemalloc
+from array import array
+
+import _setup  # repository root on the path and as cwd, no window or audio device
+
+import pygame
+import random
+from settings import *
+from controls import ACTION_BITS
+from replay import LiveInput
+
+# 99% of steady-state frames may briefly hold at most this many bytes of new Python objects; the rest are
+# frames where re-adding pooled rain drops makes a sprite group rebuild its dict (36 KB for all_sprites)
+FRAME_ALLOCATION_LIMIT = 8 * 1024
+WALK = ['right', 'down', 'left', 'up']
+
+
+class WalkingInput(LiveInput):
+    # walks a square around the start point at a fixed dt, so every run does the same work
+    def __init__(self):
+        super().__init__(0)
+        self.frame = 0
+
+    def next_frame(self, dt):
+        self.mask = ACTION_BITS[WALK[self.frame // 60 % len(WALK)]]
+        self.frame += 1
+        return 1 / 60
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure Python allocations per frame once the game is warmed up.')
+    parser.add_argument('--warmup', type=int, default=600, help='frames run before measuring, fills the pools')
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--limit', type=int, default=FRAME_ALLOCATION_LIMIT, help='bytes allowed per frame at p99')
+    parser.add_argument('--top', type=int, default=0, help='also list the source lines allocating the most')
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    from level import Level
+    random.seed(0)
+    level = Level(WalkingInput())
+    level.set_raining(True)
+    for _ in range(args.warmup):
+        level.run(0)
+
+    collections = sum(stats['collections'] for stats in gc.get_stats())
+    tracemalloc.start(1)
+    before = tracemalloc.take_snapshot() if args.top else None
+    start, _ = tracemalloc.get_traced_memory()
+    peaks = array('q', [0] * args.frames)  # no int objects kept alive while measuring
+    for frame in range(args.frames):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        level.run(0)
+        peaks[frame] = tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - start
+    if args.top:
+        for stat in tracemalloc.take_snapshot().compare_to(before, 'lineno')[:args.top]:
+            print(stat)
+    tracemalloc.stop()
+    collections = sum(stats['collections'] for stats in gc.get_stats()) - collections
+
+    peaks = sorted(peaks)
+    p99 = peaks[len(peaks) * 99 // 100]
+    print(f'{args.frames} frames: per-frame allocation peak p50 {peaks[len(peaks) // 2]} B, p99 {p99} B, '
+          f'max {peaks[-1]} B, retained {retained} B, {collections} gc collections')
+    if p99 > args.limit:
+        print(f'over 1% of steady-state frames allocate more than {args.limit} B', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
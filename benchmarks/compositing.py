@@ -0,0 +1,54 @@
+import argparse
+import os
+import time
+
+import _setup  # repository root on the path and as cwd, no window or audio device
+
+import pygame
+from level import Level
+from settings import *
+
+SIZES = {'1080p': (1920, 1080), '1440p': (2560, 1440)}
+
+
+def thread_counts():
+    counts, count = [], 1
+    while count < os.cpu_count():
+        counts.append(count)
+        count *= 2
+    return counts + [os.cpu_count()]
+
+
+def bench(size, threads, frames, map_path):
+    pygame.display.set_mode(size)
+    level = Level(composite_threads=threads, map_path=map_path)
+    camera, player = level.all_sprites, level.player
+    start_x, start_y = player.rect.center
+    for frame in range(-10, frames):  # the first frames warm up the thread pool
+        if frame == 0:
+            start = time.perf_counter()
+        player.rect.center = (start_x + frame * 8 % 1600, start_y)  # pan so the visible set changes
+        camera.surface.fill('black')
+        camera.custom_draw(player)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the world pass drawn in bands on 1, 2, 4 ... threads.')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--threads', type=int, nargs='+', default=thread_counts())
+    parser.add_argument('--map', default=MAP_PATH, help='e.g. a larger map written by mapgen.py')
+    args = parser.parse_args()
+
+    pygame.init()
+    print(f'{os.cpu_count()} cores')
+    for name, size in SIZES.items():
+        single = None
+        for threads in args.threads:
+            ms = bench(size, threads, args.frames, args.map)
+            single = single or ms
+            print(f'{name} {threads:3} threads {ms:8.2f} ms/frame  x{single / ms:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import time
+
+import _setup  # repository root on the path and as cwd, no window or audio device
+
+import pygame
+import random
+from settings import *
+
+
+def bench(count, frames, map_path):
+    from level import Level
+    random.seed(0)
+    level = Level(map_path=map_path, herd_size=count)
+    herd = level.herd
+    totals = {'update': 0, 'cull': 0, 'frame': 0}
+
+    def timed(name, func):
+        def call(*args):
+            start = time.perf_counter()
+            func(*args)
+            totals[name] += time.perf_counter() - start
+        return call
+
+    herd.update = timed('update', herd.update)
+    herd.cull = timed('cull', herd.cull)
+    run = timed('frame', level.run)
+    visible = 0
+    for index in range(-30, frames):  # the first frames fill the image caches
+        if index == 0:
+            totals.update(dict.fromkeys(totals, 0))
+        run(1 / 60)
+        if index >= 0:
+            visible += len(herd.visible)
+    return [totals[name] / frames * 1000 for name in ('update', 'cull', 'frame')] + [visible / frames]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the villager herd update, culling and whole frames.')
+    parser.add_argument('--counts', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--map', default=MAP_PATH, help='e.g. a larger map written by mapgen.py')
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    print(f'{"agents":>6} {"update":>9} {"cull":>9} {"frame":>9} {"on screen":>10}')
+    for count in args.counts:
+        update, cull, frame, visible = bench(count, args.frames, args.map)
+        print(f'{count:6} {update:6.3f} ms {cull:6.3f} ms {frame:6.2f} ms {visible:10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+from settings import *
+from timer import scheduler
+
+# actions in bit order; appending keeps old recordings readable (with the default bindings the bits
+# match the keys version 1 recordings were made with)
+ACTIONS = [
+    'up', 'down', 'left', 'right',
+    'tool', 'next_tool', 'seed', 'next_seed',
+    'interact', 'close', 'zoom_in', 'zoom_out',
+]
+ACTION_BITS = {action: 1 << index for index, action in enumerate(ACTIONS)}
+
+
+class Controls:
+    # turns the actions held each frame, from whichever input source, into the ones that fired:
+    # pressed, or held past their repeat time
+    def __init__(self, repeats=ACTION_REPEAT):
+        self.mask = 0  # actions held this frame
+        self.fired = 0  # actions that fired this frame
+        self.changes = 0  # frames anything was pressed, released or fired, so readers can tell what they missed
+        self.groups = [(sum(ACTION_BITS[action] for action in actions), ms) for actions, ms in repeats.items()]
+        self.repeat_mask = sum(bits for bits, _ in self.groups)
+        self.ready = [0] * len(self.groups)  # game time each group may fire again
+
+    def update(self, mask):
+        if mask == self.mask and not mask & self.repeat_mask:
+            # nothing pressed, released or waiting to repeat, so nothing to do
+            self.fired = 0
+            return
+        fired = mask & ~self.mask & ~self.repeat_mask
+        held = mask & self.repeat_mask
+        if held:
+            for index, (bits, ms) in enumerate(self.groups):
+                if held & bits and scheduler.time >= self.ready[index]:
+                    fired |= held & bits
+                    self.ready[index] = scheduler.time + ms
+        if fired or mask != self.mask:
+            self.changes += 1
+        self.fired = fired
+        self.mask = mask
+
+    def held(self, action):
+        return bool(self.mask & ACTION_BITS[action])
+
+    def triggered(self, action):
+        return bool(self.fired & ACTION_BITS[action])
@@ -0,0 +1,143 @@
+import random
+import numpy as np
+import pygame
+from settings import *
+from support import import_folder
+from telemetry import telemetry
+
+FACINGS = ['up', 'down', 'left', 'right']
+UP, DOWN, LEFT, RIGHT = range(4)
+RADIUS = 16  # half the width of an agent's feet, kept out of blocked tiles
+
+
+class HerdAgent:
+    # what the camera draws for one agent on screen; the herd's arrays hold the actual state
+    __slots__ = ('image', 'rect', 'z')
+
+    def __init__(self, image):
+        self.image = image
+        self.rect = image.get_rect()
+        self.z = LAYERS['main']
+
+
+def blocked_tiles(map_rect, obstacles):
+    # True for every tile an obstacle rect touches
+    blocked = np.zeros((map_rect.height // TILE_SIZE, map_rect.width // TILE_SIZE), bool)
+    for rect in obstacles:
+        blocked[rect.top // TILE_SIZE:(rect.bottom - 1) // TILE_SIZE + 1,
+                rect.left // TILE_SIZE:(rect.right - 1) // TILE_SIZE + 1] = True
+    return blocked
+
+
+class Herd:
+    # many wandering villagers kept in arrays and moved all at once
+    def __init__(self, count, camera, map_rect, obstacles):
+        self.count = count
+        self.rng = np.random.default_rng(random.getrandbits(32))  # follows the game seed, so replays match
+        self.blocked = blocked_tiles(map_rect, obstacles)
+        self.map_size = np.array(map_rect.size)
+        self.import_assets()
+        # start on free tiles, standing, each for a random time
+        rows, cols = self.blocked.shape
+        tiles = self.rng.choice(np.flatnonzero(~self.blocked), count)
+        self.x = (tiles % cols + 0.5) * TILE_SIZE
+        self.y = (tiles // cols + 0.5) * TILE_SIZE
+        self.dx = np.zeros(count)
+        self.dy = np.zeros(count)
+        self.walking = np.zeros(count, bool)
+        self.facing = self.rng.integers(0, 4, count)
+        self.timer = self.rng.uniform(*HERD_STATE_TIME, count)
+        self.frame = np.zeros(count)
+        self.tint = self.rng.integers(0, len(HERD_TINTS), count)
+        # one drawable record per agent, only the visible ones are brought up to date
+        self.agents = [HerdAgent(self.animations[0][0][0]) for _ in range(count)]
+        self.visible = []
+        self.half_size = np.array(self.agents[0].rect.size) / 2 if count else np.zeros(2)
+        camera.herds.append(self)
+
+    def import_assets(self):
+        # animations[tint][walking * 4 + facing] -> frames, tinted copies of the player's cropped to what
+        # any of them covers, as most of each frame is transparent and blitting it would be wasted
+        statuses = [f'{facing}_idle' for facing in FACINGS] + FACINGS
+        frames = [import_folder('graphics/character/' + status) for status in statuses]
+        first = frames[0][0]
+        crop = first.get_bounding_rect().unionall([frame.get_bounding_rect() for status_frames in frames
+                                                   for frame in status_frames])
+        self.image_offset = (crop.centerx - first.get_width() // 2, crop.centery - first.get_height() // 2)
+        self.animations = []
+        for tint in HERD_TINTS:
+            tinted = []
+            for status_frames in frames:
+                copies = [telemetry.track(frame.subsurface(crop).copy(), 'herd.frames') for frame in status_frames]
+                for copy in copies:
+                    copy.fill(tint, special_flags=pygame.BLEND_RGB_MULT)
+                tinted.append(copies)
+            self.animations.append(tinted)
+        self.frame_counts = np.array([len(status_frames) for status_frames in frames])
+
+    def turn(self, index):
+        # agents whose timer ran out start walking in a random direction, or stop
+        self.walking[index] = ~self.walking[index]
+        angle = self.rng.uniform(0, 2 * np.pi, index.size)
+        walking = self.walking[index]
+        self.dx[index] = np.where(walking, np.cos(angle), 0)
+        self.dy[index] = np.where(walking, np.sin(angle), 0)
+        self.timer[index] = self.rng.uniform(*HERD_STATE_TIME, index.size)
+        self.frame[index] = 0
+
+    def is_blocked(self, x, y):
+        inside = (x >= 0) & (y >= 0) & (x < self.map_size[0]) & (y < self.map_size[1])
+        rows, cols = self.blocked.shape
+        col = np.clip((x // TILE_SIZE).astype(int), 0, cols - 1)
+        row = np.clip((y // TILE_SIZE).astype(int), 0, rows - 1)
+        return ~inside | self.blocked[row, col]
+
+    def move(self, dt):
+        # one axis at a time like Player.move; a step whose leading edge enters a blocked tile is undone
+        # and the agent turns around on that axis
+        step = HERD_SPEED * dt
+        x = self.x + self.dx * step
+        blocked = self.is_blocked(x + np.sign(self.dx) * RADIUS, self.y)
+        self.x = np.where(blocked, self.x, x)
+        self.dx[blocked] *= -1
+        y = self.y + self.dy * step
+        blocked = self.is_blocked(self.x, y + np.sign(self.dy) * RADIUS)
+        self.y = np.where(blocked, self.y, y)
+        self.dy[blocked] *= -1
+
+    def animate(self, dt):
+        facing = np.where(np.abs(self.dx) > np.abs(self.dy),
+                          np.where(self.dx > 0, RIGHT, LEFT), np.where(self.dy > 0, DOWN, UP))
+        self.facing = np.where(self.walking, facing, self.facing)
+        self.frame += 4 * dt
+        self.frame %= self.frame_counts[self.walking * 4 + self.facing]
+
+    def update(self, dt):
+        self.timer -= dt
+        expired = np.flatnonzero(self.timer <= 0)
+        if expired.size:
+            self.turn(expired)
+        self.move(dt)
+        self.animate(dt)
+
+    def cull(self, view):
+        # collects the agents overlapping the view, with image and position updated for the camera
+        self.visible.clear()
+        inside = ((np.abs(self.x - view.centerx) < view.width / 2 + self.half_size[0]) &
+                  (np.abs(self.y - view.centery) < view.height / 2 + self.half_size[1]))
+        index = np.flatnonzero(inside)
+        if not index.size:
+            return
+        statuses = (self.walking[index] * 4 + self.facing[index]).tolist()
+        frames = self.frame[index].astype(int).tolist()
+        xs = (np.rint(self.x[index]).astype(int) + self.image_offset[0]).tolist()
+        ys = (np.rint(self.y[index]).astype(int) + self.image_offset[1]).tolist()
+        for agent_index, tint, status, frame, x, y in zip(index.tolist(), self.tint[index].tolist(), statuses, frames,
+                                                         xs, ys):
+            agent = self.agents[agent_index]
+            agent.image = self.animations[tint][status][frame]
+            agent.rect.center = (x, y)
+            self.visible.append(agent)
+
+    def __iter__(self):
+        return iter(self.visible)
@@ -1,79 +1,127 @@
+import os
 import pygame
 from settings import *
 from player import Player
 from overlay import Overlay
-from sprites import Generic, Water, WildFlower, Tree, Interaction
+from sprites import Generic, StaticTile, SharedAnimation, Water, WildFlower, Tree, Interaction
 from pytmx.util_pygame import load_pygame
-from support import import_folder
+from support import import_folder, load_image, load_sound
 from transition import Transition
 from soil import SoilLayer
 from sky import Rain, Sky
 from random import randint
+from collections import Counter
+from itertools import chain
+from operator import attrgetter
+from concurrent.futures import ThreadPoolExecutor
 from sprites import Particle
 from menu import Menu
+from herd import Herd
+from timer import scheduler
+from rollover import DayRollover, chunked
+from replay import LiveInput
+from controls import Controls
+from telemetry import telemetry, count_classes
+from render import RenderScaler, MipCache
+from startup import startup
 
 
 class Level:
-    def __init__(self):
+    def __init__(self, input_source=None, render_scale=1, composite_threads=COMPOSITE_THREADS, map_path=MAP_PATH,
+                 growth_mode=GROWTH_MODE, herd_size=HERD_SIZE):
+        self.map_path = map_path
+        self.herd_size = herd_size
+        self.input_source = input_source or LiveInput()  # live keyboard, recorder or replayer
+        self.controls = Controls()  # the actions the input source holds, turned into presses and repeats
         self.display_surface = pygame.display.get_surface()  # screen
-        self.all_sprites = CameraGroup()  # sprite groups
+        scheduler.clear()  # timers from a previous level must not fire into this one
+        self.all_sprites = CameraGroup(composite_threads)  # sprite groups
+        self.scaler = RenderScaler() if render_scale == 'auto' else None
+        self.all_sprites.set_render_scale(1 if self.scaler else render_scale)
+        self.active_sprites = pygame.sprite.Group()  # only sprites that need a per-frame update
         self.collision_sprites = pygame.sprite.Group()  # contains all 'collidable' sprites
         self.interaction_sprites = pygame.sprite.Group()  # contains all 'interactable' sprites
         self.tree_sprites = pygame.sprite.Group()  # contains all trees
-        self.soil_layer = SoilLayer(self.all_sprites, self.collision_sprites)
-        self.setup()
+        with startup.phase('tmx load'):
+            tmx_data = load_pygame(map_path)
+        self.soil_layer = SoilLayer(self.all_sprites, self.collision_sprites, tmx_data, growth_mode)
+        with startup.phase('sprite creation'):
+            self.setup(tmx_data)
         self.overlay = Overlay(self.player)
-        self.transition = Transition(self.reset, self.player)
-        self.rain = Rain(self.all_sprites)
+        self.rollover = DayRollover(self.plan_reset, self.snapshot_day)
+        self.transition = Transition(self.rollover, self.reset, self.wake, self.player)
         self.raining = randint(0, 10) > 3  # a lot of rain, ngl
         self.soil_layer.raining = self.raining
         self.sky = Sky()
         self.shop_active = False
-        self.menu = Menu(self.player, self.toggle_shop)
-        self.success = pygame.mixer.Sound('audio/success.wav')
-        self.success.set_volume(0.3)
-        self.bg_music = pygame.mixer.Sound('audio/bg.mp3')
-        self.bg_music.set_volume(0.3)
-        self.bg_music.play(loops=-1)
+        # built on first use: rain on the first rainy frame, the menu when the shop first opens
+        self._rain = None
+        self._menu = None
+        self.success = load_sound('audio/success.wav', 0.3)
+        with startup.phase('audio'):
+            pygame.mixer.music.load('audio/bg.mp3')  # streamed instead of decoded up front
+        pygame.mixer.music.set_volume(0.3)
+        pygame.mixer.music.play(loops=-1)
+        self.day = 0
+        telemetry.new_series()
+        self.sample_telemetry()
 
-    def setup(self):
-        tmx_data = load_pygame('data/map.tmx')
+    @property
+    def rain(self):
+        if self._rain is None:
+            self._rain = Rain(self.all_sprites, self.active_sprites, self.map_rect)
+        return self._rain
+
+    @property
+    def menu(self):
+        if self._menu is None:
+            self._menu = Menu(self.player, self.toggle_shop, self.controls)
+        return self._menu
+
+    def setup(self, tmx_data):
+        self.map_rect = pygame.Rect(0, 0, tmx_data.width * TILE_SIZE, tmx_data.height * TILE_SIZE)
+        for image in tmx_data.images:
+            if image:
+                telemetry.track(image, self.map_path)
 
         # house floor/furniture bottom
         for layer in ['HouseFloor', 'HouseFurnitureBottom']:  # order is significant here
             for x, y, surface in tmx_data.get_layer_by_name(layer).tiles():
-                Generic(pos=(x * TILE_SIZE, y * TILE_SIZE), surface=surface, groups=self.all_sprites,
-                        z=LAYERS['house-bottom'])
+                StaticTile(pos=(x * TILE_SIZE, y * TILE_SIZE), surface=surface, camera=self.all_sprites,
+                           z=LAYERS['house-bottom'])
         # house walls/furniture top
         for layer in ['HouseWalls', 'HouseFurnitureTop']:  # order is significant here
             for x, y, surface in tmx_data.get_layer_by_name(layer).tiles():
-                Generic(pos=(x * TILE_SIZE, y * TILE_SIZE), surface=surface, groups=self.all_sprites)
+                StaticTile(pos=(x * TILE_SIZE, y * TILE_SIZE), surface=surface, camera=self.all_sprites)
         # fence
         for x, y, surface in tmx_data.get_layer_by_name('Fence').tiles():
             Generic(pos=(x * TILE_SIZE, y * TILE_SIZE), surface=surface, groups=[self.all_sprites, self.collision_sprites])
         # water
+        self.water_animation = SharedAnimation(import_folder('graphics/water'))
         for x, y, surface in tmx_data.get_layer_by_name('Water').tiles():
-            Water(pos=(x * TILE_SIZE, y * TILE_SIZE), frames=import_folder('graphics/water'), groups=self.all_sprites)
+            Water(pos=(x * TILE_SIZE, y * TILE_SIZE), animation=self.water_animation, groups=self.all_sprites)
         # trees
         for obj in tmx_data.get_layer_by_name('Trees'):
             Tree((obj.x, obj.y), obj.image, [self.all_sprites, self.collision_sprites, self.tree_sprites], obj.name, self.player_add)
         # wildflowers
         for obj in tmx_data.get_layer_by_name('Decoration'):
             WildFlower((obj.x, obj.y), obj.image, [self.all_sprites, self.collision_sprites])
-        # collision tiles
+        # collision tiles (never drawn, so they can all share one blank surface)
+        collision_surface = telemetry.track(pygame.Surface((TILE_SIZE, TILE_SIZE)), 'level.collision')
         for x, y, surface in tmx_data.get_layer_by_name('Collision').tiles():
-            Generic(pos=(x * TILE_SIZE, y * TILE_SIZE), surface=pygame.Surface((TILE_SIZE, TILE_SIZE)), groups=self.collision_sprites)
+            Generic(pos=(x * TILE_SIZE, y * TILE_SIZE), surface=collision_surface, groups=self.collision_sprites)
         # player
         for obj in tmx_data.get_layer_by_name('Player'):
             if obj.name == 'Start':
                 self.player = Player(
                     pos=(obj.x, obj.y),
-                    group=self.all_sprites,
+                    group=[self.all_sprites, self.active_sprites],
                     collision_sprites=self.collision_sprites,
                     tree_sprites=self.tree_sprites,
                     interaction_sprites=self.interaction_sprites,
                     soil_layer=self.soil_layer,
-                    toggle_shop=self.toggle_shop)
+                    toggle_shop=self.toggle_shop,
+                    controls=self.controls)
             elif obj.name == 'Bed':
                 Interaction(
                     pos=(obj.x, obj.y),
@@ -89,32 +137,63 @@ class Level:
                     name=obj.name
                 )
 
-        Generic(
-            pos=(0, 0),
-            surface=pygame.image.load('graphics/world/ground.png').convert_alpha(),
-            groups=self.all_sprites,
-            z=LAYERS['ground'])
+        # ground: one pre-rendered image, or a tile layer on generated maps too large for one surface
+        ground_layer = tmx_data.properties.get('ground_layer')
+        if ground_layer:
+            for x, y, surface in tmx_data.get_layer_by_name(ground_layer).tiles():
+                StaticTile(pos=(x * TILE_SIZE, y * TILE_SIZE), surface=surface, camera=self.all_sprites, z=LAYERS['ground'])
+        else:
+            ground = tmx_data.properties.get('ground')
+            StaticTile(
+                pos=(0, 0),
+                surface=load_image(os.path.join(os.path.dirname(self.map_path), ground) if ground else 'graphics/world/ground.png'),
+                camera=self.all_sprites,
+                z=LAYERS['ground'])
+
+        # wandering villagers, kept off everything the player collides with and out of the water
+        self.herd = None
+        if self.herd_size:
+            obstacles = [sprite.hitbox for sprite in self.collision_sprites if hasattr(sprite, 'hitbox')]
+            obstacles.extend(pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                             for x, y, _ in tmx_data.get_layer_by_name('Water').tiles())
+            self.herd = Herd(self.herd_size, self.all_sprites, self.map_rect, obstacles)
 
     def run(self, dt):
-        self.display_surface.fill('black')
+        dt = self.input_source.next_frame(dt)  # a replay substitutes the recorded dt
+        scheduler.update(dt)  # fire timers, particle and drop expiries that are due
+        self.controls.update(self.input_source.mask)
+        if self.scaler:
+            self.all_sprites.set_render_scale(self.scaler.update(dt))
+        self.zoom_input()
+        # world pass at the internal resolution, then scaled up once; the HUD below is drawn natively
+        self.all_sprites.surface.fill((0, 0, 0))  # a colour name leaks a little on every fill in pygame 2.6
         self.all_sprites.custom_draw(self.player)
+        self.sky.display(dt, self.all_sprites.surface)
+        self.all_sprites.present()
 
         if self.shop_active:
             self.menu.update()
         else:
-            self.all_sprites.update(dt)
+            self.active_sprites.update(dt)
+            self.water_animation.animate(dt)  # once for every water tile
+            if self.herd:
+                self.herd.update(dt)
             self.harvest()
 
         self.overlay.display()
 
         if self.raining and not self.shop_active:
-            self.rain.update()
-
-        self.sky.display(dt)
+            self.rain.update(dt, self.all_sprites.view_rect())
 
         if self.player.sleep:
             self.transition.play()
 
+    def zoom_input(self):
+        if self.controls.triggered('zoom_in'):
+            self.all_sprites.step_zoom(1)
+        elif self.controls.triggered('zoom_out'):
+            self.all_sprites.step_zoom(-1)
+
     def player_add(self, item):
         self.player.item_inventory[item] += 1
         self.success.play()
@@ -122,55 +201,226 @@ class Level:
     def toggle_shop(self):
         self.shop_active = not self.shop_active
 
-    def reset(self):
-        # plants
-        self.soil_layer.update_plants()
-        # soil
-        self.soil_layer.remove_water()
-        self.raining = randint(0, 10) > 3
-        self.soil_layer.raining = self.raining
-        if self.raining:
-            self.soil_layer.water_all()
+    def set_raining(self, raining):
+        self.raining = raining
+        self.soil_layer.raining = raining
+
+    def snapshot_day(self):
+        soil_layer = self.soil_layer
+        return soil_layer.plant_sprites.sprites(), soil_layer.water_sprites.sprites(), self.tree_sprites.sprites()
+
+    def plan_reset(self, rng, plants, water_tiles, trees):
+        # runs on the rollover worker; only reads the world and yields jobs for the main thread a chunk at a time
+        soil_layer = self.soil_layer
+        # plants (in realtime mode they grow on their own while watered)
+        if soil_layer.growth_mode == 'daily':
+            for chunk in chunked(plants):
+                yield soil_layer.grow_plants, [plant for plant in chunk if 'W' in plant.cell]
+        # soil: only the water sprites change during the fade, the 'W' flags that plants read flip in the final jobs
+        dry_cells = []
+        for chunk in chunked(water_tiles):  # each watered cell has exactly one WaterTile
+            dry_cells.extend(soil_layer.grid[tile.rect.top // TILE_SIZE][tile.rect.left // TILE_SIZE] for tile in chunk)
+            yield soil_layer.remove_water_tiles, chunk
+        raining = rng.randint(0, 10) > 3
+        wet_rows = []
+        if raining:
+            for index_row, row in enumerate(soil_layer.grid):
+                cols = [index_col for index_col, cell in enumerate(row) if 'X' in cell]
+                yield soil_layer.add_water_tiles, index_row, cols, [rng.choice(soil_layer.water_surfaces) for _ in cols]
+                wet_rows.append((index_row, cols))
         # trees
-        for tree in self.tree_sprites.sprites():
-            for apple in tree.apple_sprites.sprites():
-                apple.kill()
-            tree.create_fruit()
+        for chunk in chunked(trees):
+            yield self.grow_fruits, chunk, [tree.plan_fruit(rng) for tree in chunk]
+        # the rain flag decides whether Rain draws on the global rng, and realtime growth is scheduled from
+        # scheduler.time, so both only change at the darkest frame
+        return [(soil_layer.dry_cells, dry_cells), (soil_layer.wet_cells, wet_rows), (self.set_raining, raining)]
 
+    def reset(self):
+        self.rollover.finish()  # apply whatever the sleep transition has not applied yet
         self.sky.start_color = [255, 255, 255]
+        self.day += 1
+        if not self.player.sleep:  # reset without a fade (simulate.py), nothing left to wait for
+            self.sample_telemetry()
+
+    def wake(self):
+        self.sample_telemetry()  # the darkest frame already pays for finish(), sample once the fade is over
+
+    @staticmethod
+    def grow_fruits(trees, positions):
+        for tree, tree_positions in zip(trees, positions):
+            tree.grow_fruit(tree_positions)
+
+    def sample_telemetry(self):
+        soil_layer = self.soil_layer
+        flags = Counter(chain.from_iterable(chain.from_iterable(soil_layer.grid)))  # counted in C, the grid can be large
+        groups = {
+            'all_sprites': len(self.all_sprites),
+            'static_tiles': len(self.all_sprites.static_tiles),
+            'active_sprites': len(self.active_sprites),
+            'collision_sprites': len(self.collision_sprites),
+            'interaction_sprites': len(self.interaction_sprites),
+            'tree_sprites': len(self.tree_sprites),
+            'soil_sprites': len(soil_layer.soil_sprites),
+            'water_sprites': len(soil_layer.water_sprites),
+            'plant_sprites': len(soil_layer.plant_sprites),
+            'particle_pool': len(Particle.pool),
+            'rain': self._rain.live if self._rain else 0,
+            'rain_spawned': self._rain.spawned if self._rain else 0,  # drops so far this level, live is only what is out now
+            'herd': self.herd.count if self.herd else 0,
+        }
+        world = {
+            'tilled': flags['X'],
+            'watered': flags['W'],
+            'planted': flags['P'],
+            'trees': len(self.tree_sprites),
+            'apples': sum(len(tree.apple_sprites.spritedict) for tree in self.tree_sprites),  # len() copies the group
+        }
+        return telemetry.sample(self.day, groups, count_classes(self.all_sprites), world)
 
     def harvest(self):
-        if self.soil_layer.plant_sprites:
-            for plant in self.soil_layer.plant_sprites.sprites():
-                if plant.harvestable and plant.rect.colliderect(self.player.hitbox):
-                    self.player_add(plant.plant_type)
-                    plant.kill()
-                    Particle(plant.rect.topleft, plant.image, self.all_sprites, z=LAYERS['main'])
-                    row = plant.rect.centery // TILE_SIZE
-                    col = plant.rect.centerx // TILE_SIZE
-                    self.soil_layer.grid[row][col].remove('P')
+        # only plants in the cells around the player can touch it (their images stay within a tile of
+        # their cell), so the cost does not grow with how many are planted
+        hitbox = self.player.hitbox
+        plants = self.soil_layer.plants
+        for row in range(hitbox.top // TILE_SIZE - 1, hitbox.bottom // TILE_SIZE + 2):
+            for col in range(hitbox.left // TILE_SIZE - 1, hitbox.right // TILE_SIZE + 2):
+                plant = plants.get((col, row))
+                if plant and plant.harvestable and plant.rect.colliderect(hitbox):
+                    self.harvest_plant(plant)
+
+    def harvest_plant(self, plant):
+        self.player_add(plant.plant_type)
+        plant.kill()
+        Particle.spawn(plant.rect.topleft, plant.image, self.all_sprites, z=LAYERS['main'])
+        self.soil_layer.remove_plant(plant)
+
+
+by_depth = attrgetter('rect.centery')
 
 
 class CameraGroup(pygame.sprite.Group):
-    def __init__(self):
+    def __init__(self, composite_threads=1):
         super().__init__()
         self.display_surface = pygame.display.get_surface()
-        self.offset = pygame.math.Vector2()
+        self.offset = pygame.math.Vector2()  # top left of the view in the world
+        self.static_tiles = []  # StaticTile records drawn alongside the sprites
+        self.herds = []  # each yields the agents it culled to the view, drawn alongside the sprites
+        self.render_scale = None
+        self.zoom_index = ZOOM_LEVELS.index(1)
+        self.scale = 1  # world pixels to surface pixels: zoom times render scale
+        self.surface = self.display_surface  # where the world pass draws
+        self.mips = MipCache()
+        self.cropped = {}  # sprite -> (image, world pos) for sprites too large to cache scaled, this frame only
+        # pygame releases the GIL while blitting, so bands of the world surface can be drawn in parallel
+        self.executor = ThreadPoolExecutor(composite_threads) if composite_threads > 1 else None
+        self.band_count = composite_threads
+        self.bands = []
+        self.band_rects = []  # one reusable blit rect per band
+        # per-frame state reused between frames so drawing allocates nothing
+        self.view = pygame.Rect(0, 0, 0, 0)
+        self.layers = [[] for _ in LAYERS]  # visible sprites by z, the LAYERS values run 0, 1, 2 ...
+        self.blit_rect = pygame.Rect(0, 0, 0, 0)
+
+    @property
+    def zoom(self):
+        return ZOOM_LEVELS[self.zoom_index]
+
+    def step_zoom(self, step):
+        self.zoom_index = min(max(self.zoom_index + step, 0), len(ZOOM_LEVELS) - 1)
+
+    def set_render_scale(self, scale):
+        if scale == self.render_scale:
+            return
+        self.render_scale = scale
+        if scale == 1:
+            self.surface = self.display_surface
+        else:
+            width, height = self.display_surface.get_size()
+            self.surface = telemetry.track(pygame.Surface((round(width * scale), round(height * scale))).convert(),
+                                           'camera.world_surface')
+        self.bands = self.split_bands(self.surface) if self.executor else []
+        self.band_rects = [pygame.Rect(0, 0, 0, 0) for _ in self.bands]
+
+    def split_bands(self, surface):
+        # horizontal strips sharing the surface's pixels, each with its own clip
+        width, height = surface.get_size()
+        edges = [height * index // self.band_count for index in range(self.band_count + 1)]
+        return [surface.subsurface((0, top, width, bottom - top)) for top, bottom in zip(edges, edges[1:])]
+
+    def crop(self, sprite):
+        # scales only the part in view, every frame, instead of keeping a huge scaled copy
+        area = sprite.rect.clip(self.view)
+        visible = sprite.image.subsurface(area.move(-sprite.rect.x, -sprite.rect.y))
+        size = (max(1, round(area.width * self.scale)), max(1, round(area.height * self.scale)))
+        return pygame.transform.scale(visible, size), area.topleft
+
+    def view_rect(self):
+        # the part of the world on screen, in world coordinates, as of the last custom_draw (shared, do not modify)
+        return self.view
+
+    def present(self):
+        if self.surface is not self.display_surface:
+            pygame.transform.scale(self.surface, self.display_surface.get_size(), self.display_surface)
 
     def custom_draw(self, player):
-        self.offset.x = player.rect.centerx - SCREEN_WIDTH / 2
-        self.offset.y = player.rect.centery - SCREEN_HEIGHT / 2
-        for layer in LAYERS.values():
-            for sprite in sorted(self.sprites(), key=lambda s: s.rect.centery):
-                if sprite.z == layer:
-                    offset_rect = sprite.rect.copy()
-                    offset_rect.center -= self.offset
-                    self.display_surface.blit(sprite.image, offset_rect)
-
-                    # if sprite == player:
-                    #     pygame.draw.rect(self.display_surface, 'red', offset_rect, 5)
-                    #     hitbox_rect = player.hitbox.copy()
-                    #     hitbox_rect.center = offset_rect.center
-                    #     pygame.draw.rect(self.display_surface, 'green', hitbox_rect, 5)
-                    #     target_pos = offset_rect.center + PLAYER_TOOL_OFFSETS[player.status.split('_')[0]]
-                    #     pygame.draw.circle(self.display_surface, 'blue', target_pos, 5)
+        width, height = self.display_surface.get_size()
+        zoom = self.zoom
+        self.scale = self.render_scale * zoom
+        # zooming in shows less of the world, centred on the player either way
+        self.view.width = round(width / zoom)
+        self.view.height = round(height / zoom)
+        self.view.center = player.rect.center
+        self.offset.update(self.view.x, self.view.y)
+        # bucket what is on screen by layer, then sort each layer by depth
+        self.cropped.clear()
+        for layer in self.layers:
+            layer.clear()
+        for herd in self.herds:
+            herd.cull(self.view)
+        for sprite in chain(self.static_tiles, self.spritedict, *self.herds):  # spritedict, as sprites() copies the group
+            if self.view.colliderect(sprite.rect):
+                self.layers[sprite.z].append(sprite)
+                if self.scale != 1:  # scaled images are prepared here, not from the band threads
+                    if self.mips.fits(sprite.image, self.scale):
+                        self.mips.get(sprite.image, self.scale)
+                    else:
+                        self.cropped[sprite] = self.crop(sprite)
+        for layer in self.layers:
+            layer.sort(key=by_depth)
+
+        if self.executor:
+            for _ in self.executor.map(self.draw_band, self.bands, self.band_rects):
+                pass  # all bands are done before the sky and the HUD draw over them
+        else:
+            self.draw_band(self.surface, self.blit_rect)
+        self.mips.trim()
+
+        # offset_rect = player.rect.move(-self.view.x, -self.view.y)
+        # pygame.draw.rect(self.display_surface, 'red', offset_rect, 5)
+        # hitbox_rect = player.hitbox.copy()
+        # hitbox_rect.center = offset_rect.center
+        # pygame.draw.rect(self.display_surface, 'green', hitbox_rect, 5)
+        # target_pos = offset_rect.center + PLAYER_TOOL_OFFSETS[player.facing]
+        # pygame.draw.circle(self.display_surface, 'blue', target_pos, 5)
+
+    def draw_band(self, band, blit_rect):
+        # every layer in depth order, moved into the band's coordinates; anything outside it is skipped
+        top = band.get_offset()[1]
+        height = band.get_height()
+        scale = self.scale
+        for layer in self.layers:
+            for sprite in layer:
+                if scale == 1:
+                    image = sprite.image
+                    blit_rect.x = sprite.rect.x - self.view.x
+                    blit_rect.y = sprite.rect.y - self.view.y - top
+                else:
+                    if sprite in self.cropped:
+                        image, (x, y) = self.cropped[sprite]
+                    else:
+                        image = self.mips.peek(sprite.image, scale)
+                        x, y = sprite.rect.x, sprite.rect.y
+                    blit_rect.x = round((x - self.view.x) * scale)
+                    blit_rect.y = round((y - self.view.y) * scale) - top
+                if blit_rect.y < height and blit_rect.y + image.get_height() > 0:
+                    band.blit(image, blit_rect)
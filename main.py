@@ -1,30 +1,109 @@
-import pygame
+import argparse
+import os
 import sys
+import time
 
-from level import Level
-from settings import *
+from startup import startup  # first, so time to first frame includes the imports below
+with startup.phase('imports'):
+    import pygame
+    import random
+    from level import Level
+    from replay import LiveInput, Recorder, Replayer
+    from telemetry import telemetry
+    from settings import *
 
 
 class Game:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    def __init__(self, args):
+        startup.enabled = args.startup_report
+        with startup.phase('display'):
+            pygame.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption('Sprout Land')
         self.clock = pygame.time.Clock()
-        self.level = Level()
+        self.input_source = self.create_input_source(args)
+        random.seed(self.input_source.seed)  # every random roll in the game follows from this seed
+        # a replay runs on the map, growth mode and herd it was recorded with, whatever the command line says
+        map_path, growth_mode, herd_size = self.input_source.settings
+        self.level = Level(self.input_source, args.render_scale, args.composite_threads, map_path, growth_mode,
+                           herd_size)
+        self.trace_path = args.trace
+        self.frame_times = []
+
+    @staticmethod
+    def create_input_source(args):
+        if args.replay:
+            return Replayer(args.replay)
+        seed = random.getrandbits(32)
+        settings = (args.map, args.growth_mode, args.herd)
+        if args.record:
+            return Recorder(args.record, seed, settings)
+        return LiveInput(seed, settings)
+
+    def quit(self):
+        self.input_source.close()
+        if self.frame_times:
+            self.report()
+        pygame.quit()
+        sys.exit()
+
+    def report(self):
+        times = sorted(self.frame_times)
+        count = len(times)
+        print(f'{count} frames, {sum(times):.0f} ms total, mean {sum(times) / count:.2f} ms, '
+              f'p50 {times[count // 2]:.2f} ms, p95 {times[int(count * 0.95)]:.2f} ms, '
+              f'p99 {times[int(count * 0.99)]:.2f} ms, max {times[-1]:.2f} ms')
+        if self.trace_path:
+            with open(self.trace_path, 'w') as file:
+                file.write('frame,ms\n')
+                file.writelines(f'{index},{ms:.3f}\n' for index, ms in enumerate(self.frame_times))
 
     def run(self):
+        replaying = isinstance(self.input_source, Replayer)
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+                    self.quit()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                    self.level.sample_telemetry()
+                    telemetry.export('telemetry.json')
+                self.input_source.handle_event(event)
+            if self.input_source.done:
+                self.quit()
 
+            start = time.perf_counter()
             dt = self.clock.tick() / 1000
             self.level.run(dt)
             pygame.display.update()
+            startup.first_frame()
+            if replaying or self.trace_path:
+                self.frame_times.append((time.perf_counter() - start) * 1000)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Sprout Land')
+    parser.add_argument('--record', metavar='PATH',
+                        help='record input, frame times, the rng seed and the world settings to PATH')
+    parser.add_argument('--replay', metavar='PATH', help='replay a recording and print frame time statistics')
+    parser.add_argument('--headless', action='store_true', help='run without opening a window or audio device')
+    parser.add_argument('--render-scale', default=1, type=lambda value: value if value == 'auto' else float(value),
+                        help="internal resolution of the world pass, e.g. 0.5, or 'auto' to follow the frame time")
+    parser.add_argument('--map', default=MAP_PATH, help='TMX map to play, e.g. one written by mapgen.py')
+    parser.add_argument('--growth-mode', choices=['daily', 'realtime'], default=GROWTH_MODE,
+                        help='grow crops once a night, or continuously while they are watered')
+    parser.add_argument('--herd', type=int, default=HERD_SIZE, metavar='COUNT',
+                        help='add this many villagers wandering the map')
+    parser.add_argument('--composite-threads', type=int, default=COMPOSITE_THREADS,
+                        help='draw the world pass in this many horizontal bands on a thread pool')
+    parser.add_argument('--trace', metavar='PATH', help='write per-frame times in ms to a CSV file on exit')
+    parser.add_argument('--startup-report', action='store_true', help='print time spent per startup phase at the first frame')
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    game = Game()
+    args = parse_args()
+    if args.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    game = Game(args)
     game.run()
@@ -0,0 +1,279 @@
+import argparse
+import math
+import os
+import random
+import xml.etree.ElementTree as ET
+
+# only surfaces are composed here, no window is needed
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from settings import *
+
+SOURCE_MAP = 'data/map.tmx'
+HOUSE_LAYERS = ['HouseFloor', 'HouseWalls', 'HouseFurnitureBottom', 'HouseFurnitureTop']
+# gids as numbered by the tileset list of data/map.tmx, which every generated map copies
+GRASS, FARMABLE, COLLISION, WATER = 43, 169, 170, 171
+TREES = {'Large': 148, 'Small': 149}
+DECORATIONS = [143, 147, 150, 151, 152]  # bush, sunflower, flower, mushroom, mushrooms
+MERCHANT = 144
+GROUND_IMAGE_LIMIT = 8192  # larger maps draw their Ground layer as tiles instead of one image
+
+
+def parse_csv(layer):
+    width = int(layer.get('width'))
+    gids = [int(gid) for gid in layer.find('data').text.replace('\n', '').split(',')]
+    return [gids[row * width:(row + 1) * width] for row in range(len(gids) // width)]
+
+
+class SourceMap:
+    # the hand-made map: tilesets, the house, and what the fence and object tiles look like
+    def __init__(self, path=SOURCE_MAP):
+        self.directory = os.path.dirname(path)
+        root = ET.parse(path).getroot()
+        self.tilesets = [(int(tileset.get('firstgid')), tileset.get('source')) for tileset in root.iter('tileset')]
+        self.layers = {layer.get('name'): parse_csv(layer) for layer in root.iter('layer')}
+        self.objects = {group.get('name'): [obj.attrib for obj in group] for group in root.iter('objectgroup')}
+        self.fences = self.read_fences()
+        self.object_sizes = self.read_object_sizes()
+
+    def tileset(self, name):
+        for firstgid, source in self.tilesets:
+            if os.path.splitext(os.path.basename(source))[0] == name:
+                return firstgid, ET.parse(os.path.join(self.directory, source)).getroot()
+
+    def read_fences(self):
+        # (top, right, bottom, left) connections -> gid, from the tileset's edge wang set
+        firstgid, tileset = self.tileset('Fences')
+        fences = {}
+        for tile in tileset.iter('wangtile'):
+            wangid = [int(value) for value in tile.get('wangid').split(',')]
+            fences[tuple(bool(wangid[index]) for index in (0, 2, 4, 6))] = firstgid + int(tile.get('tileid'))
+        return fences
+
+    def read_object_sizes(self):
+        firstgid, tileset = self.tileset('Objects')
+        return {firstgid + int(tile.get('id')): (int(tile.find('image').get('width')), int(tile.find('image').get('height')))
+                for tile in tileset.iter('tile')}
+
+    def grass_tile(self):
+        firstgid, tileset = self.tileset('Grass')
+        image = tileset.find('image')
+        sheet = pygame.image.load(os.path.join(self.directory, 'Tilesets', image.get('source')))
+        columns = int(tileset.get('columns'))
+        index = GRASS - firstgid
+        return sheet.subsurface(((index % columns) * TILE_SIZE, (index // columns) * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+
+    def house_region(self):
+        # tile rect around the house, the player start and the bed
+        cells = [(x, y) for name in HOUSE_LAYERS for y, row in enumerate(self.layers[name]) for x, gid in enumerate(row) if gid]
+        for obj in self.objects['Player']:
+            if obj['name'] in ('Start', 'Bed'):
+                cells.append((int(float(obj['x'])) // TILE_SIZE, int(float(obj['y'])) // TILE_SIZE))
+        left, top = min(x for x, _ in cells) - 1, min(y for _, y in cells) - 1
+        return pygame.Rect(left, top, max(x for x, _ in cells) + 2 - left, max(y for _, y in cells) + 2 - top)
+
+
+class MapGenerator:
+    def __init__(self, source, width, height, seed):
+        self.source = source
+        self.width, self.height = width, height
+        self.random = random.Random(seed)
+        self.layers = {name: [[0] * width for _ in range(height)]
+                       for name in ['Water', 'Ground', 'Fence', *HOUSE_LAYERS, 'Collision', 'Farmable']}
+        self.objects = {'Trees': [], 'Decoration': [], 'Player': []}
+        self.blocked = set()  # cells no feature may be placed on
+        for x in range(width):
+            for y in (0, height - 1):
+                self.set('Collision', x, y, COLLISION)
+        for y in range(height):
+            for x in (0, width - 1):
+                self.set('Collision', x, y, COLLISION)
+
+    def set(self, layer, x, y, gid):
+        self.layers[layer][y][x] = gid
+        self.blocked.add((x, y))
+
+    def free(self, rect):
+        return (rect.left >= 1 and rect.top >= 1 and rect.right <= self.width - 1 and rect.bottom <= self.height - 1
+                and not any((x, y) in self.blocked for x in range(rect.left, rect.right) for y in range(rect.top, rect.bottom)))
+
+    def add_object(self, group, gid, x, bottom, name=''):
+        width, height = self.source.object_sizes[gid]
+        self.objects[group].append({'name': name, 'gid': gid, 'x': x, 'y': bottom, 'width': width, 'height': height})
+
+    def stamp_house(self):
+        # the hand-made house goes in the middle with the trader just to its right
+        region = self.source.house_region()
+        dx, dy = self.width // 2 - region.centerx, self.height // 2 - region.centery
+        for name in HOUSE_LAYERS + ['Collision', 'Fence']:
+            for y in range(region.top, region.bottom):
+                for x in range(region.left, region.right):
+                    if self.source.layers[name][y][x]:
+                        self.set(name, x + dx, y + dy, self.source.layers[name][y][x])
+        for obj in self.source.objects['Player']:
+            if obj['name'] in ('Start', 'Bed'):
+                self.objects['Player'].append({**obj, 'x': float(obj['x']) + dx * TILE_SIZE, 'y': float(obj['y']) + dy * TILE_SIZE})
+        self.blocked.update((x + dx, y + dy) for x in range(region.left, region.right) for y in range(region.top, region.bottom))
+
+        merchant_x, merchant_bottom = (region.right + dx + 1) * TILE_SIZE + 67, (region.top + dy + 2) * TILE_SIZE
+        self.add_object('Decoration', MERCHANT, merchant_x, merchant_bottom)
+        self.objects['Player'].append({'name': 'Trader', 'x': merchant_x - 67, 'y': merchant_bottom - 63, 'width': 192, 'height': 131})
+        self.blocked.update((x, y) for x in range(region.right + dx, region.right + dx + 5)
+                            for y in range(region.top + dy, region.top + dy + 4))
+
+    def add_ponds(self, fraction):
+        target, placed = fraction * self.width * self.height, 0
+        for _ in range(self.width * self.height):  # attempts
+            if placed >= target:
+                break
+            cx, cy, radius = self.random.randrange(self.width), self.random.randrange(self.height), self.random.uniform(1.5, 5)
+            reach = math.ceil(radius)
+            if not self.free(pygame.Rect(cx - reach - 1, cy - reach - 1, 2 * reach + 3, 2 * reach + 3)):
+                continue
+            for y in range(cy - reach, cy + reach + 1):
+                for x in range(cx - reach, cx + reach + 1):
+                    if (x - cx) ** 2 + (y - cy) ** 2 <= radius ** 2:
+                        self.set('Water', x, y, WATER)
+                        self.set('Collision', x, y, COLLISION)
+                        placed += 1
+
+    def add_fields(self, fraction):
+        # fenced rectangles of farmable soil, open in the middle of the bottom fence
+        target, placed = fraction * self.width * self.height, 0
+        for _ in range(self.width * self.height):  # attempts
+            if placed >= target:
+                break
+            field = pygame.Rect(self.random.randrange(self.width), self.random.randrange(self.height),
+                                self.random.randint(4, 9), self.random.randint(3, 6))
+            fence = field.inflate(2, 2)
+            if not self.free(fence.inflate(2, 2)):  # keep a path around every fence
+                continue
+            for y in range(field.top, field.bottom):
+                for x in range(field.left, field.right):
+                    self.set('Farmable', x, y, FARMABLE)
+                    placed += 1
+            ring = {(x, y) for x in range(fence.left, fence.right) for y in (fence.top, fence.bottom - 1)}
+            ring |= {(x, y) for y in range(fence.top, fence.bottom) for x in (fence.left, fence.right - 1)}
+            ring.discard((fence.centerx, fence.bottom - 1))
+            for x, y in ring:
+                connections = ((x, y - 1) in ring, (x + 1, y) in ring, (x, y + 1) in ring, (x - 1, y) in ring)
+                self.set('Fence', x, y, self.source.fences[connections])
+            self.blocked.update((x, y) for x in range(fence.left - 1, fence.right + 1) for y in range(fence.top - 1, fence.bottom + 1))
+
+    def scatter(self, group, gids, density, names=None):
+        # density is objects per 100 tiles; trees keep their neighbouring cells clear
+        for _ in range(round(density * self.width * self.height / 100)):
+            for _ in range(20):
+                x, y = self.random.randrange(1, self.width - 1), self.random.randrange(1, self.height - 1)
+                if (x, y) not in self.blocked:
+                    break
+            else:
+                continue
+            index = self.random.randrange(len(gids))
+            width, _ = self.source.object_sizes[gids[index]]
+            self.add_object(group, gids[index], x * TILE_SIZE + (TILE_SIZE - width) // 2 + self.random.randint(-8, 8),
+                            (y + 1) * TILE_SIZE, names[index] if names else '')
+            reach = 1 if group == 'Trees' else 0
+            self.blocked.update((x + i, y + j) for i in range(-reach, reach + 1) for j in range(-reach, reach + 1))
+
+    def fill_ground(self):
+        for y in range(self.height):
+            for x in range(self.width):
+                if not self.layers['Water'][y][x]:
+                    self.layers['Ground'][y][x] = GRASS
+
+    def render_ground(self, path):
+        # water cells stay transparent, the animated Water sprites show through them like on ground.png
+        grass = self.source.grass_tile()
+        surface = pygame.Surface((self.width * TILE_SIZE, self.height * TILE_SIZE), pygame.SRCALPHA)
+        for y, row in enumerate(self.layers['Ground']):
+            for x, gid in enumerate(row):
+                if gid:
+                    surface.blit(grass, (x * TILE_SIZE, y * TILE_SIZE))
+        pygame.image.save(surface, path)
+
+    def write(self, path, properties):
+        directory = os.path.dirname(path)
+        root = ET.Element('map', version='1.8', tiledversion='1.8.6', orientation='orthogonal', renderorder='right-down',
+                          width=str(self.width), height=str(self.height), tilewidth=str(TILE_SIZE), tileheight=str(TILE_SIZE),
+                          infinite='0')
+        if properties:
+            element = ET.SubElement(root, 'properties')
+            for name, value in properties.items():
+                ET.SubElement(element, 'property', name=name, value=value)
+        for firstgid, source in self.source.tilesets:
+            source = os.path.relpath(os.path.join(self.source.directory, source), directory).replace(os.sep, '/')
+            ET.SubElement(root, 'tileset', firstgid=str(firstgid), source=source)
+
+        ids = iter(range(1, 1 << 30))
+        for name, rows in self.layers.items():
+            layer = ET.SubElement(root, 'layer', id=str(next(ids)), name=name, width=str(self.width), height=str(self.height))
+            if name in ('Water', 'Collision', 'Farmable'):
+                layer.set('visible', '0')
+            ET.SubElement(layer, 'data', encoding='csv').text = '\n' + ',\n'.join(','.join(map(str, row)) for row in rows) + '\n'
+        for name, objects in self.objects.items():
+            group = ET.SubElement(root, 'objectgroup', id=str(next(ids)), name=name)
+            for obj in objects:
+                element = ET.SubElement(group, 'object', id=str(next(ids)), **{key: str(value) for key, value in obj.items() if key != 'id' and value != ''})
+                if obj['name'] == 'Start':
+                    ET.SubElement(element, 'point')
+        root.set('nextlayerid', str(len(self.layers) + len(self.objects) + 1))
+        root.set('nextobjectid', str(next(ids)))
+        ET.indent(root, ' ')
+        ET.ElementTree(root).write(path, encoding='UTF-8', xml_declaration=True)
+
+
+def parse_size(text):
+    width, _, height = text.partition('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a random farm map in the layout Level.setup expects, for scaling tests.')
+    parser.add_argument('--size', type=parse_size, default=(50, 40), metavar='WxH', help='map size in tiles')
+    parser.add_argument('--scale', type=float, help='map area as a multiple of data/map.tmx, overrides --size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--trees', type=float, default=1.5, help='trees per 100 tiles')
+    parser.add_argument('--decorations', type=float, default=3, help='flowers, bushes and mushrooms per 100 tiles')
+    parser.add_argument('--water', type=float, default=0.1, help='fraction of the map covered by ponds')
+    parser.add_argument('--farmland', type=float, default=0.15, help='fraction of the map that is farmable soil')
+    parser.add_argument('--ground', choices=['auto', 'image', 'tiles'], default='auto',
+                        help=f'one ground image, or the Ground tile layer; auto uses tiles above {GROUND_IMAGE_LIMIT} px a side')
+    parser.add_argument('--output', help='TMX path, default data/generated/map_WxH.tmx')
+    args = parser.parse_args()
+
+    source = SourceMap()
+    width, height = args.size
+    if args.scale:
+        width, height = round(width * math.sqrt(args.scale)), round(height * math.sqrt(args.scale))
+    region = source.house_region()
+    if width < region.width + 12 or height < region.height + 4:
+        parser.error(f'maps need at least {region.width + 12}x{region.height + 4} tiles to fit the house and trader')
+    output = args.output or f'data/generated/map_{width}x{height}.tmx'
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+    generator = MapGenerator(source, width, height, args.seed)
+    generator.stamp_house()
+    generator.add_ponds(args.water)
+    generator.add_fields(args.farmland)
+    generator.scatter('Trees', list(TREES.values()), args.trees, list(TREES))
+    generator.scatter('Decoration', DECORATIONS, args.decorations)
+    generator.fill_ground()
+
+    ground = args.ground
+    if ground == 'auto':
+        ground = 'tiles' if max(width, height) * TILE_SIZE > GROUND_IMAGE_LIMIT else 'image'
+    if ground == 'image':
+        image_path = os.path.splitext(output)[0] + '_ground.png'
+        generator.render_ground(image_path)
+        properties = {'ground': os.path.basename(image_path)}
+    else:
+        properties = {'ground_layer': 'Ground'}
+    generator.write(output, properties)
+    print(f'{output}: {width}x{height} tiles, {len(generator.objects["Trees"])} trees, '
+          f'{sum(row.count(FARMABLE) for row in generator.layers["Farmable"])} farmable cells, ground as {ground}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,18 @@
 import pygame
 from settings import *
-from timer import Timer
+from telemetry import telemetry
+from startup import startup
 
 
 class Menu:
-    def __init__(self, player, toggle_menu):
+    def __init__(self, player, toggle_menu, controls):
         # general setup
         self.player = player
         self.toggle_menu = toggle_menu
+        self.controls = controls
         self.display_surface = pygame.display.get_surface()
-        self.font = pygame.font.Font('font/LycheeSoda.ttf', 30)
+        with startup.phase('font'):
+            self.font = pygame.font.Font('font/LycheeSoda.ttf', 30)
         # options
         self.width = 400
         self.space = 10
@@ -20,7 +23,6 @@ class Menu:
         self.setup()
         # movement
         self.index = 0
-        self.timer = Timer(200)
 
     def display_money(self):
         text_surface = self.font.render(f'${self.player.money}', False, 'Black')
@@ -34,7 +36,7 @@ class Menu:
         self.text_surfaces = []
         self.total_height = 0
         for item in self.options:
-            text_surface = self.font.render(item, False, 'Black')
+            text_surface = telemetry.track(self.font.render(item, False, 'Black'), 'menu.text')
             self.text_surfaces.append(text_surface)
             self.total_height += text_surface.get_height() + (self.padding * 2)
 
@@ -45,37 +47,44 @@ class Menu:
         self.sell_text = self.font.render('sell', False, 'Black')
 
     def input(self):
-        keys = pygame.key.get_pressed()
-        self.timer.update()
+        controls = self.controls
+        if not controls.fired:
+            return
 
-        if keys[pygame.K_ESCAPE]:
+        if controls.triggered('close'):
             self.toggle_menu()
 
-        if not self.timer.active:
-            if keys[pygame.K_UP]:
-                self.index -= 1
-                self.timer.activate()
-            if keys[pygame.K_DOWN]:
-                self.index += 1
-                self.timer.activate()
-            if keys[pygame.K_SPACE]:
-                self.timer.activate()
-                current_item = self.options[self.index]
-                if self.index <= self.sell_border:  # sell
-                    if self.player.item_inventory[current_item] > 0:
-                        self.player.item_inventory[current_item] -= 1
-                        self.player.money += SALE_PRICES[current_item]
-                else:  # buy
-                    seed_price = PURCHASE_PRICES[current_item]
-                    if self.player.money >= seed_price:
-                        self.player.seed_inventory[current_item] += 1
-                        self.player.money -= seed_price
+        if controls.triggered('up'):
+            self.index -= 1
+        if controls.triggered('down'):
+            self.index += 1
+        if controls.triggered('tool'):
+            current_item = self.options[self.index]
+            if self.index <= self.sell_border:
+                self.sell(current_item)
+            else:
+                self.buy(current_item)
 
         if self.index < 0:
             self.index = len(self.options) - 1
         if self.index > len(self.options) - 1:
             self.index = 0
 
+    def sell(self, item):
+        if self.player.item_inventory[item] > 0:
+            self.player.item_inventory[item] -= 1
+            self.player.money += SALE_PRICES[item]
+            return True
+        return False
+
+    def buy(self, seed):
+        seed_price = PURCHASE_PRICES[seed]
+        if self.player.money >= seed_price:
+            self.player.seed_inventory[seed] += 1
+            self.player.money -= seed_price
+            return True
+        return False
+
     def show_entry(self, text_surface, amount, top, selected):
         # background
         bg_rect = pygame.Rect(self.main_rect.left, top, self.width, text_surface.get_height() + self.padding * 2)
@@ -1,5 +1,6 @@
 import pygame
 from settings import *
+from support import load_image
 
 
 class Overlay:
@@ -9,22 +10,20 @@ class Overlay:
         self.player = player
         # imports
         overlay_path = 'graphics/overlay/'
-        self.tool_surfaces = {tool: pygame.image.load(f'{overlay_path}{tool}.png').convert_alpha()
+        self.tool_surfaces = {tool: load_image(f'{overlay_path}{tool}.png')
                               for tool in player.tools}
-        print('tool surfaces')
-        print(self.tool_surfaces)
-        self.seed_surfaces = {seed: pygame.image.load(f'{overlay_path}{seed}.png').convert_alpha()
+        self.seed_surfaces = {seed: load_image(f'{overlay_path}{seed}.png')
                               for seed in player.seeds}
-        print('seed surfaces')
-        print(self.seed_surfaces)
+        self.tool_rects = {tool: surface.get_rect(midbottom=OVERLAY_POSITIONS['tool'])
+                           for tool, surface in self.tool_surfaces.items()}
+        self.seed_rects = {seed: surface.get_rect(midbottom=OVERLAY_POSITIONS['seed'])
+                           for seed, surface in self.seed_surfaces.items()}
 
     def display(self):
         # tool
-        tool_surface = self.tool_surfaces[self.player.selected_tool]
-        tool_rect = tool_surface.get_rect(midbottom=OVERLAY_POSITIONS['tool'])
-        self.display_surface.blit(tool_surface, tool_rect)
+        tool = self.player.selected_tool
+        self.display_surface.blit(self.tool_surfaces[tool], self.tool_rects[tool])
 
         # seed
-        seed_surface = self.seed_surfaces[self.player.selected_seed]
-        seed_rect = seed_surface.get_rect(midbottom=OVERLAY_POSITIONS['seed'])
-        self.display_surface.blit(seed_surface, seed_rect)
+        seed = self.player.selected_seed
+        self.display_surface.blit(self.seed_surfaces[seed], self.seed_rects[seed])
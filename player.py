@@ -3,13 +3,18 @@ from settings import *
 from support import *
 from timer import Timer
 
+# status names built once, so get_status does not concatenate strings every frame
+IDLE_STATUS = {facing: f'{facing}_idle' for facing in PLAYER_TOOL_OFFSETS}
+TOOL_STATUS = {facing: {tool: f'{facing}_{tool}' for tool in ('hoe', 'axe', 'water')} for facing in PLAYER_TOOL_OFFSETS}
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, pos, group, collision_sprites, tree_sprites, interaction_sprites, soil_layer, toggle_shop):
+    def __init__(self, pos, group, collision_sprites, tree_sprites, interaction_sprites, soil_layer, toggle_shop,
+                 controls):
         super().__init__(group)
         # import assets
         self.import_assets()
         self.status = 'down_idle'
+        self.facing = 'down'
         self.frame_index = 0
         # general setup
         self.image = self.animations[self.status][self.frame_index]
@@ -18,6 +23,7 @@ class Player(pygame.sprite.Sprite):
         # movement attributes
         self.direction = pygame.math.Vector2()
         self.pos = pygame.math.Vector2(self.rect.center)
+        self.target_pos = pygame.math.Vector2()
         self.speed = 200
         # collision
         self.hitbox = self.rect.copy().inflate((-126, -70))  # shrink x by 126, shrink y by 70
@@ -25,9 +31,7 @@ class Player(pygame.sprite.Sprite):
         # timers
         self.timers = {
             'tool-use': Timer(350, self.use_tool),  # call use_tool after 350 ms
-            'tool-switch': Timer(200),
             'seed-use': Timer(350, self.use_seed),  # call use_seed after 350 ms
-            'seed-switch': Timer(200),
         }
         # tool attributes
         self.tools = ['hoe', 'axe', 'water']
@@ -55,9 +59,11 @@ class Player(pygame.sprite.Sprite):
         self.sleep = False
         self.soil_layer = soil_layer
         self.toggle_shop = toggle_shop
+        self.controls = controls
+        self.input_changes = None  # controls.changes when input was last looked at
+        self.input_blocked = None  # and whether it was ignored then
         # sound
-        self.watering = pygame.mixer.Sound('audio/water.mp3')
-        self.watering.set_volume(0.2)
+        self.watering = load_sound('audio/water.mp3', 0.2)
 
     def use_tool(self):
         if self.selected_tool == 'hoe':
@@ -71,7 +77,8 @@ class Player(pygame.sprite.Sprite):
             self.watering.play()
 
     def get_target_pos(self):
-        self.target_pos = self.rect.center + PLAYER_TOOL_OFFSETS[self.status.split('_')[0]]
+        offset = PLAYER_TOOL_OFFSETS[self.facing]
+        self.target_pos.update(self.rect.centerx + offset.x, self.rect.centery + offset.y)
 
     def use_seed(self):
         if self.seed_inventory[self.selected_seed] > 0:
@@ -98,57 +105,65 @@ class Player(pygame.sprite.Sprite):
         self.image = self.animations[self.status][int(self.frame_index)]
 
     def input(self):
-        keys = pygame.key.get_pressed()
-
-        if not self.timers['tool-use'].active and not self.sleep:  # disable input when tool in use or player sleeping
+        controls = self.controls
+        blocked = self.timers['tool-use'].active or self.sleep  # no input while a tool is in use or asleep
+        if controls.changes == self.input_changes and blocked == self.input_blocked:
+            return  # same actions and state as last time, so nothing would change
+        self.input_changes = controls.changes
+        self.input_blocked = blocked
+
+        if not blocked:
             # directions
-            if keys[pygame.K_UP]:
+            if controls.held('up'):
                 self.direction.y = -1
                 self.status = 'up'
-            elif keys[pygame.K_DOWN]:
+                self.facing = 'up'
+            elif controls.held('down'):
                 self.direction.y = 1
                 self.status = 'down'
+                self.facing = 'down'
             else:
                 self.direction.y = 0  # no vertical movement
 
-            if keys[pygame.K_RIGHT]:
+            if controls.held('right'):
                 self.direction.x = 1
                 self.status = 'right'
-            elif keys[pygame.K_LEFT]:
+                self.facing = 'right'
+            elif controls.held('left'):
                 self.direction.x = -1
                 self.status = 'left'
+                self.facing = 'left'
             else:
                 self.direction.x = 0  # no horizontal movement
 
-            # tool use (space)
-            if keys[pygame.K_SPACE]:
+            # tool use, again once it is done while still held
+            if controls.held('tool'):
                 self.timers.get('tool-use').activate()
-                self.direction = pygame.math.Vector2()
+                self.direction.update(0, 0)
                 self.frame_index = 0
+                self.input_blocked = True
 
-            # change tool ('q')
-            if keys[pygame.K_q] and not self.timers['tool-switch'].active:
-                self.timers['tool-switch'].activate()
+            # change tool
+            if controls.triggered('next_tool'):
                 self.tool_index += 1
                 if self.tool_index >= len(self.tools):
                     self.tool_index = 0
                 self.selected_tool = self.tools[self.tool_index]
 
-            # seed use (left ctrl)
-            if keys[pygame.K_LCTRL]:
+            # seed use
+            if controls.triggered('seed'):
                 self.timers.get('seed-use').activate()
-                self.direction = pygame.math.Vector2()
+                self.direction.update(0, 0)
                 self.frame_index = 0
 
-            # change seed ('e')
-            if keys[pygame.K_e] and not self.timers['seed-switch'].active:
-                self.timers['seed-switch'].activate()
+            # change seed
+            if controls.triggered('next_seed'):
                 self.seed_index += 1
                 if self.seed_index >= len(self.seeds):
                     self.seed_index = 0
                 self.selected_seed = self.seeds[self.seed_index]
 
-        if keys[pygame.K_RETURN]:
+        if controls.triggered('interact'):
             collided_interaction_sprite = pygame.sprite.spritecollide(sprite=self, group=self.interaction_sprites,
                                                                       dokill=False)
             if collided_interaction_sprite:
@@ -156,26 +171,21 @@ class Player(pygame.sprite.Sprite):
                     self.toggle_shop()
                 elif collided_interaction_sprite[0].name == 'Bed':
                     self.status = 'left_idle'
+                    self.facing = 'left'
                     self.sleep = True
+                    self.input_blocked = True
                 else:
                     pass
 
     def get_status(self):
-        d = None
         # add '_idle' to status if no movement
-        if self.direction.magnitude() == 0:
-            d = self.status.split('_')[0]
-            self.status = d + '_idle'
-
-        if self.timers['tool-use'].active and d is not None:
-            self.status = d + '_' + self.selected_tool
-
-    def update_timers(self):
-        for timer in self.timers.values():
-            timer.update()
+        if self.direction.x == 0 and self.direction.y == 0:
+            self.status = IDLE_STATUS[self.facing]
+            if self.timers['tool-use'].active:
+                self.status = TOOL_STATUS[self.facing][self.selected_tool]
 
     def collision(self, direction):
-        for sprite in self.collision_sprites.sprites():
+        for sprite in self.collision_sprites.spritedict:  # the group's own dict, sprites() would copy it every call
             if hasattr(sprite, 'hitbox'):
                 if sprite.hitbox.colliderect(self.hitbox):
                     if direction == 'horizontal':
@@ -195,8 +205,8 @@ class Player(pygame.sprite.Sprite):
 
     def move(self, dt):
         # normalize
-        if self.direction.magnitude() > 0:
-            self.direction = self.direction.normalize()
+        if self.direction.x or self.direction.y:
+            self.direction.normalize_ip()
         # horizontal
         self.pos.x += self.direction.x * self.speed * dt
         self.hitbox.centerx = round(self.pos.x)
@@ -211,7 +221,6 @@ class Player(pygame.sprite.Sprite):
     def update(self, dt):
         self.input()
         self.get_status()
-        self.update_timers()
         self.get_target_pos()
         self.move(dt)
         self.animate(dt)
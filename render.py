@@ -0,0 +1,64 @@
+import pygame
+from collections import OrderedDict
+from settings import *
+from telemetry import telemetry
+
+
+class RenderScaler:
+    # picks the internal render scale from the measured frame time
+    def __init__(self, scales=RENDER_SCALES, target=RENDER_TARGET_FRAME_TIME):
+        self.scales = scales  # largest first
+        self.index = 0
+        self.target = target
+        self.average = target
+        self.hold = 0  # seconds until the scale may change again, so it does not flicker between steps
+
+    @property
+    def scale(self):
+        return self.scales[self.index]
+
+    def update(self, dt):
+        self.average += (dt - self.average) * 0.1
+        self.hold -= dt
+        if self.hold <= 0:
+            if self.average > self.target * 1.15 and self.index < len(self.scales) - 1:
+                self.index += 1
+                self.hold = RENDER_SCALE_HOLD
+            elif self.average < self.target * 0.7 and self.index > 0:
+                self.index -= 1
+                self.hold = RENDER_SCALE_HOLD
+        return self.scale
+
+
+class MipCache:
+    # pre-scaled copies of images, one per scale they are drawn at, built on first use
+    def __init__(self, limit=MIP_CACHE_LIMIT):
+        self.limit = limit
+        self.entries = OrderedDict()  # (image, scale) -> scaled image, least recently used first
+        self.bytes = 0
+
+    def fits(self, image, scale):
+        # images that would take a large share of the cache scaled (the ground up close) are not cached
+        return image.get_width() * image.get_height() * image.get_bytesize() * scale * scale <= self.limit / 4
+
+    def get(self, image, scale):
+        key = (image, scale)
+        scaled = self.entries.get(key)
+        if scaled is None:
+            width, height = image.get_size()
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            scaled = telemetry.track(pygame.transform.scale(image, size), 'camera.mip')
+            self.entries[key] = scaled
+            self.bytes += scaled.get_pitch() * scaled.get_height()
+        else:
+            self.entries.move_to_end(key)
+        return scaled
+
+    def peek(self, image, scale):
+        return self.entries[image, scale]
+
+    def trim(self):
+        # called once a frame is drawn, so nothing the frame uses goes missing halfway through
+        while self.bytes > self.limit and self.entries:
+            _, scaled = self.entries.popitem(last=False)
+            self.bytes -= scaled.get_pitch() * scaled.get_height()
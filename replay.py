@@ -0,0 +1,105 @@
+import pygame
+import struct
+from settings import *
+from controls import ACTION_BITS
+
+MAGIC = b'SVRP'
+VERSION = 2
+# magic, version, rng seed, herd size, growth mode, byte length of the map path that follows the header
+HEADER = struct.Struct('<4sHII8sH')
+FRAME = struct.Struct('<dH')  # dt in seconds, held action mask
+
+
+class LiveInput:
+    # the actions held each frame, from the key events Game.run passes on
+    done = False  # a live session only ends when the window is closed
+
+    def __init__(self, seed=None, settings=None, bindings=KEY_BINDINGS):
+        self.seed = seed
+        self.settings = settings  # (map path, growth mode, herd size), everything besides input the simulation follows
+        self.mask = 0  # actions held this frame, one bit each in ACTIONS order
+        self.keys_down = set()
+        self.held = 0  # actions whose keys are down right now
+        self.pressed = 0  # actions pressed since the last frame, so a tap shorter than a frame still counts
+        self.bind(bindings)
+
+    def bind(self, bindings):
+        self.key_bits = {}
+        for action, keys in bindings.items():
+            for key in keys:
+                self.key_bits[key] = self.key_bits.get(key, 0) | ACTION_BITS[action]
+        self.update_held()
+
+    def update_held(self):
+        self.held = 0
+        for key in self.keys_down:
+            self.held |= self.key_bits.get(key, 0)
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            self.keys_down.add(event.key)
+            self.pressed |= self.key_bits.get(event.key, 0)
+            self.update_held()
+        elif event.type == pygame.KEYUP:
+            self.keys_down.discard(event.key)
+            self.update_held()
+        elif event.type == pygame.WINDOWFOCUSLOST:  # the key ups go to another window
+            self.keys_down.clear()
+            self.update_held()
+
+    def next_frame(self, dt):
+        self.mask = self.held | self.pressed
+        self.pressed = 0
+        return dt
+
+    def close(self):
+        pass
+
+
+class Recorder(LiveInput):
+    def __init__(self, path, seed, settings):
+        super().__init__(seed, settings)
+        map_path, growth_mode, herd_size = settings
+        map_path = map_path.encode()
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, herd_size, growth_mode.encode(), len(map_path)) + map_path)
+
+    def next_frame(self, dt):
+        dt = super().next_frame(dt)
+        self.file.write(FRAME.pack(dt, self.mask))
+        return dt
+
+    def close(self):
+        self.file.close()
+
+
+class Replayer:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        if data[:6] != struct.pack('<4sH', MAGIC, VERSION):  # laid out the same in every version
+            raise ValueError(f'{path} is not a version {VERSION} input recording')
+        _, _, self.seed, herd_size, growth_mode, map_length = HEADER.unpack_from(data)
+        frames_start = HEADER.size + map_length
+        map_path = data[HEADER.size:frames_start].decode()
+        self.settings = (map_path, growth_mode.rstrip(b'\0').decode(), herd_size)
+        self.frames = list(FRAME.iter_unpack(data[frames_start:]))
+        self.index = 0
+        self.mask = 0
+
+    @property
+    def done(self):
+        return self.index >= len(self.frames)
+
+    def next_frame(self, dt):
+        # the recorded dt replaces the measured one so the simulation advances exactly as it did
+        dt, mask = self.frames[self.index]
+        self.index += 1
+        self.mask = mask
+        return dt
+
+    def handle_event(self, event):
+        pass  # the recording decides what is held
+
+    def close(self):
+        pass
@@ -0,0 +1,71 @@
+import gc
+import time
+from settings import *
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from random import Random, getrandbits
+
+
+def chunked(items, size=ROLLOVER_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class DayRollover:
+    def __init__(self, plan, snapshot):
+        # (rng, *snapshot) -> generator of jobs, returning the final jobs; a job is (func, *args) covering a whole chunk
+        self.plan = plan
+        self.snapshot = snapshot  # () -> tuple of plain lists, taken on the main thread
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self.jobs = deque()  # filled by the worker a job at a time, emptied by the main thread
+        self.final_jobs = []  # held back until finish() so their frame doesn't depend on worker timing
+        self.started = False
+
+    def start(self):
+        # the worker gets its own seeded rng so it never races the main thread on the global one
+        rng = Random(getrandbits(32))
+        gc.freeze()  # the fade allocates a lot, keep the collector from rescanning the whole world meanwhile
+        self.future = self.executor.submit(self.run_plan, rng, self.snapshot())
+        self.started = True
+
+    def run_plan(self, rng, snapshot, pause=ROLLOVER_PAUSE):
+        plan = self.plan(rng, *snapshot)
+        while True:
+            try:
+                self.jobs.append(next(plan))
+            except StopIteration as stop:
+                return stop.value
+            if pause:
+                time.sleep(pause)  # planning is pure Python, it would hold the GIL for whole frames
+
+    def collect(self):
+        if self.future and self.future.done():
+            self.receive()
+
+    def step(self, frames_left):
+        # spreads the jobs known so far evenly over the frames left before finish()
+        self.collect()
+        for _ in range(ceil(len(self.jobs) / max(frames_left, 1))):
+            func, *args = self.jobs.popleft()
+            func(*args)
+
+    def finish(self):
+        if not self.started:
+            # no frames to spread the day over, so plan it right here without pausing
+            self.final_jobs = self.run_plan(Random(getrandbits(32)), self.snapshot(), pause=0)
+        if self.future:
+            self.receive()  # blocks only if the worker is still planning
+        self.jobs.extend(self.final_jobs)
+        self.final_jobs = []
+        while self.jobs:
+            func, *args = self.jobs.popleft()
+            func(*args)
+        if self.started:
+            gc.unfreeze()
+        self.started = False
+
+    def receive(self):
+        self.final_jobs = self.future.result()
+        self.future = None
@@ -1,3 +1,4 @@
+import pygame
 from pygame import Vector2
 
 SCREEN_WIDTH = 1280
@@ -17,6 +18,30 @@ PLAYER_TOOL_OFFSETS = {
     'down': Vector2(0, 50),
 }
 
+# keys for each action; LiveInput.bind takes a dict like this to rebind them
+KEY_BINDINGS = {
+    'up': [pygame.K_UP],
+    'down': [pygame.K_DOWN],
+    'left': [pygame.K_LEFT],
+    'right': [pygame.K_RIGHT],
+    'tool': [pygame.K_SPACE],
+    'next_tool': [pygame.K_q],
+    'seed': [pygame.K_LCTRL],
+    'next_seed': [pygame.K_e],
+    'interact': [pygame.K_RETURN],
+    'close': [pygame.K_ESCAPE],
+    'zoom_in': [pygame.K_EQUALS],
+    'zoom_out': [pygame.K_MINUS],
+}
+# actions that repeat while held, in groups sharing one timer: once one fires, the group waits this many ms
+# before firing again; the other actions fire once per press
+ACTION_REPEAT = {
+    ('up', 'down', 'tool'): 200,  # moving through the shop menu and buying or selling
+    ('next_tool',): 200,
+    ('next_seed',): 200,
+    ('zoom_in', 'zoom_out'): 200,
+}
+
 # layers will be drawn in the order specified by the entry value
 LAYERS = {
     'water': 0,
@@ -41,6 +66,10 @@ GROW_SPEED = {
     'corn': 1,
     'tomato': 0.7
 }
+# 'daily': watered crops grow once a night; 'realtime': they grow while watered, one stage per
+# GROWTH_STAGE_TIME / GROW_SPEED ms of game time
+GROWTH_MODE = 'daily'
+GROWTH_STAGE_TIME = 30000
 
 SALE_PRICES = {
     'wood': 4,
@@ -49,6 +78,39 @@ SALE_PRICES = {
     'tomato': 20
 }
 
+MAP_PATH = 'data/map.tmx'
+
+# wandering villagers: how many, their walking speed in px/s, how long (s) they keep walking or standing,
+# and the colours their copies of the character frames are tinted with
+HERD_SIZE = 0
+HERD_SPEED = 60
+HERD_STATE_TIME = (1, 4)
+HERD_TINTS = [(255, 210, 170), (190, 220, 255), (220, 255, 190)]
+
+# internal resolution of the world pass, largest first (TILE_SIZE * scale should stay whole)
+RENDER_SCALES = [1, 0.75, 0.5]
+RENDER_TARGET_FRAME_TIME = 1 / 60
+RENDER_SCALE_HOLD = 2  # seconds between automatic scale changes
+# camera zoom steps (TILE_SIZE * zoom * render scale should stay whole) and the memory allowed for
+# images pre-scaled to the zoom and render scale, least recently drawn evicted first
+ZOOM_LEVELS = [0.5, 0.75, 1, 1.5, 2]
+MIP_CACHE_LIMIT = 96 * 1024 * 1024
+COMPOSITE_THREADS = 1  # worker threads blitting the world pass in horizontal bands, 1 draws it on the main thread
+
+# rain drops and splashes spawned per second for every million pixels around the camera view
+RAIN_DENSITY = {
+    'off': 0,
+    'low': 20,
+    'medium': 50,
+    'high': 120,
+}
+RAIN_QUALITY = 'medium'
+RAIN_MARGIN = 64  # spawn this far outside the view so drops do not pop in at the edges
+
+# day rollover: items the worker plans between pauses, so it hands the GIL back to the frame being drawn
+ROLLOVER_CHUNK_SIZE = 256
+ROLLOVER_PAUSE = 0.0005
+
 PURCHASE_PRICES = {
     'corn': 4,
     'tomato': 5
@@ -0,0 +1,251 @@
+import argparse
+import importlib
+import itertools
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+
+# simulations never open a window or an audio device
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import settings
+from level import Level
+from settings import *
+from timer import scheduler
+
+
+class Farm:
+    # drives a display-free Level one day at a time through the same soil, harvest and shop code the game uses
+    def __init__(self, seed):
+        random.seed(seed)
+        self.level = Level()
+        self.soil_layer = self.level.soil_layer
+        self.player = self.level.player
+        self.menu = self.level.menu
+        self.day = 0
+        self.harvested = {seed: 0 for seed in self.player.seeds}
+        self.cells = [(rect.x // TILE_SIZE, rect.y // TILE_SIZE) for rect in self.soil_layer.hit_rects]
+
+    @staticmethod
+    def center(cell):
+        col, row = cell
+        return col * TILE_SIZE + TILE_SIZE // 2, row * TILE_SIZE + TILE_SIZE // 2
+
+    def cell(self, cell):
+        col, row = cell
+        return self.soil_layer.grid[row][col]
+
+    def till(self, cells):
+        tilled = False
+        for cell in cells:
+            if 'F' in self.cell(cell) and 'X' not in self.cell(cell):
+                self.cell(cell).append('X')
+                tilled = True
+        if tilled:  # one rebuild for the whole batch instead of one per hoe swing like SoilLayer.get_hit
+            self.soil_layer.create_soil_tiles()
+            if self.soil_layer.raining:
+                self.soil_layer.water_all()
+
+    def plant(self, cell, seed):
+        if self.player.seed_inventory[seed] > 0 and 'X' in self.cell(cell) and 'P' not in self.cell(cell):
+            self.soil_layer.plant_seed(self.center(cell), seed)
+            self.player.seed_inventory[seed] -= 1
+            return True
+        return False
+
+    def free_cells(self):
+        return [cell for cell in self.cells if 'P' not in self.cell(cell)]
+
+    def water(self, cell):
+        if 'X' in self.cell(cell) and 'W' not in self.cell(cell):
+            self.soil_layer.water_cell(*cell, random.choice(self.soil_layer.water_surfaces))
+
+    def harvest(self):
+        for plant in self.soil_layer.plant_sprites.sprites():
+            if plant.harvestable:
+                self.harvested[plant.plant_type] += 1
+                self.level.harvest_plant(plant)
+
+    def sell(self, item, amount=None):
+        sold = 0
+        while (amount is None or sold < amount) and self.menu.sell(item):
+            sold += 1
+        return sold
+
+    def buy(self, seed, amount=None):
+        bought = 0
+        while (amount is None or bought < amount) and self.menu.buy(seed):
+            bought += 1
+        return bought
+
+    def sleep(self):
+        self.level.reset()
+        scheduler.update(1)  # let harvest particles expire back into the pool
+        self.day += 1
+
+
+def single_crop(seed):
+    def strategy(farm):
+        farm.harvest()
+        for item in farm.player.seeds:
+            farm.sell(item)
+        farm.buy(seed, len(farm.free_cells()) - farm.player.seed_inventory[seed])
+        farm.till(farm.cells)
+        for cell in farm.cells:
+            farm.plant(cell, seed)
+            farm.water(cell)
+    return strategy
+
+
+def mixed(farm):
+    farm.harvest()
+    for item in farm.player.seeds:
+        farm.sell(item)
+    needed = len(farm.free_cells()) - sum(farm.player.seed_inventory.values())
+    while needed > 0 and farm.buy('corn', 1) + farm.buy('tomato', 1):
+        needed = len(farm.free_cells()) - sum(farm.player.seed_inventory.values())
+    farm.till(farm.cells)
+    for index, cell in enumerate(farm.cells):
+        farm.plant(cell, farm.player.seeds[index % 2]) or farm.plant(cell, farm.player.seeds[(index + 1) % 2])
+        farm.water(cell)
+
+
+def best_margin(farm):
+    # picks the seed with the best profit per day under the current prices and growth speeds
+    def margin(seed):
+        days = (len(os.listdir(f'graphics/fruit/{seed}')) - 1) / GROW_SPEED[seed]
+        return (SALE_PRICES[seed] - PURCHASE_PRICES[seed]) / days
+    single_crop(max(farm.player.seeds, key=margin))(farm)
+
+
+STRATEGIES = {
+    'corn': single_crop('corn'),
+    'tomato': single_crop('tomato'),
+    'mixed': mixed,
+    'best-margin': best_margin,
+}
+
+
+def load_strategy(name):
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    module_name, _, function_name = name.partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def apply_overrides(overrides):
+    # settings dicts are shared by every module through 'from settings import *', so update them in place
+    for key, value in overrides.items():
+        table, _, item = key.partition('.')
+        getattr(settings, table)[item] = value
+
+
+def init_worker():
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+
+def run_season(job):
+    strategy_name, seed, days, overrides = job
+    defaults = {key: getattr(settings, key.partition('.')[0])[key.partition('.')[2]] for key in overrides}
+    apply_overrides(overrides)
+    try:
+        strategy = load_strategy(strategy_name)
+        farm = Farm(seed)
+        start = time.perf_counter()
+        for _ in range(days):
+            strategy(farm)
+            farm.sleep()
+        seconds = time.perf_counter() - start
+        farm.harvest()  # the season ends with whatever is ripe sold
+        for item in farm.player.seeds:
+            farm.sell(item)
+    finally:
+        apply_overrides(defaults)
+    return {
+        'strategy': strategy_name,
+        'seed': seed,
+        'overrides': overrides,
+        'days': days,
+        'money': farm.player.money,
+        'harvested': farm.harvested,
+        'items': farm.player.item_inventory,
+        'seconds': seconds,
+        'ticks_per_second': days / seconds,  # a tick is one simulated day
+    }
+
+
+def parse_value(text):
+    return float(text) if '.' in text else int(text)
+
+
+def build_jobs(args):
+    sweeps = {}
+    for entry in args.sweep:
+        key, _, values = entry.partition('=')
+        sweeps[key] = [parse_value(value) for value in values.split(',')]
+    fixed = {}
+    for entry in args.set:
+        key, _, value = entry.partition('=')
+        fixed[key] = parse_value(value)
+
+    jobs = []
+    for strategy in args.strategy:
+        for combination in itertools.product(*sweeps.values()):
+            overrides = dict(fixed, **dict(zip(sweeps, combination)))
+            for run in range(args.runs):
+                jobs.append((strategy, args.seed + run, args.days, overrides))
+    return jobs
+
+
+def summarise(results):
+    groups = {}
+    for result in results:
+        key = (result['strategy'], json.dumps(result['overrides'], sort_keys=True))
+        groups.setdefault(key, []).append(result)
+    for (strategy, overrides), group in sorted(groups.items()):
+        money = sum(result['money'] for result in group) / len(group)
+        tps = sum(result['ticks_per_second'] for result in group) / len(group)
+        print(f'{strategy:12} {overrides:40} runs {len(group):4}  mean money {money:10.1f}  {tps:8.1f} days/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run display-free farm seasons in parallel to tune prices and growth.')
+    parser.add_argument('--strategy', nargs='+', default=['corn'],
+                        help=f'built-in ({", ".join(STRATEGIES)}) or module:function taking a Farm, called once a day')
+    parser.add_argument('--runs', type=int, default=8, help='seasons per strategy and parameter combination')
+    parser.add_argument('--days', type=int, default=28, help='days per season')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first run, later runs count up from it')
+    parser.add_argument('--set', action='append', default=[], metavar='TABLE.KEY=VALUE',
+                        help='fixed override such as SALE_PRICES.corn=12')
+    parser.add_argument('--sweep', action='append', default=[], metavar='TABLE.KEY=V1,V2',
+                        help='run every value, such as GROW_SPEED.tomato=0.5,0.7,0.9')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--output', default='simulation.jsonl', help='results file, one JSON line per season')
+    args = parser.parse_args()
+
+    jobs = build_jobs(args)
+    results = []
+    start = time.perf_counter()
+    pool = Pool(args.processes, initializer=init_worker)
+    with open(args.output, 'w') as output:
+        for result in pool.imap_unordered(run_season, jobs):
+            output.write(json.dumps(result) + '\n')
+            output.flush()  # results are usable while the batch is still running
+            results.append(result)
+    # SDL handles SIGTERM in the workers, so Pool.terminate() would hang; let them exit on their own
+    pool.close()
+    pool.join()
+    elapsed = time.perf_counter() - start
+
+    summarise(results)
+    days = sum(result['days'] for result in results)
+    print(f'{len(results)} seasons, {days} days in {elapsed:.1f} s ({days / elapsed:.1f} days/s over {args.processes} processes)')
+
+
+if __name__ == '__main__':
+    main()
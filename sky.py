@@ -3,69 +3,135 @@ from settings import *
 from support import import_folder
 from sprites import Generic
 from random import randint, choice
+from timer import scheduler
+from telemetry import telemetry
 
 
 class Sky:
     def __init__(self):
         self.display_surface = pygame.display.get_surface()
-        self.full_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.full_surface = telemetry.track(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)), 'sky.full_surface')
         self.start_color = [255, 255, 255]
         self.end_color = (38, 101, 189)  # nighttime sky
 
-    def display(self, dt):
+    def display(self, dt, surface=None):
         for index, value in enumerate(self.end_color):
             if self.start_color[index] > value:
                 self.start_color[index] -= 2 * dt
         self.full_surface.fill(self.start_color)
-        self.display_surface.blit(self.full_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+        # tints the world pass only, at whatever resolution it was drawn
+        (surface or self.display_surface).blit(self.full_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+
+
+# furthest a moving drop gets in its lifetime: direction (-2, 4) at speed 250 for 500 ms
+DROP_TRAVEL = (-250, 500)
 
 
 class Drop(Generic):
+    pool = []  # expired drops and splashes waiting to be reused
+    direction = pygame.math.Vector2(-2, 4)  # pointing down-left
+
     def __init__(self, surface, pos, moving, groups, z):
         # general setup
         super().__init__(pos, surface, groups, z)
+        self.pos = pygame.math.Vector2()
+        self.setup(surface, pos, moving, z)
+
+    @classmethod
+    def spawn(cls, surface, pos, moving, groups, z):
+        if not cls.pool:
+            return cls(surface, pos, moving, groups, z)
+        drop = cls.pool.pop()
+        drop.setup(surface, pos, moving, z)
+        drop.add(groups)
+        return drop
+
+    def setup(self, surface, pos, moving, z):
+        self.image = surface
+        self.rect.size = surface.get_size()
+        self.rect.topleft = pos
+        self.z = z
         self.lifetime = randint(400, 500)
-        self.start_time = pygame.time.get_ticks()
+        scheduler.schedule(self.lifetime, self.expire)
         # movement setup
         self.moving = moving
         if self.moving:
-            self.pos = pygame.math.Vector2(self.rect.topleft)
-            self.direction = pygame.math.Vector2(-2, 4)  # pointing down-left
+            self.pos.update(self.rect.topleft)
             self.speed = randint(200, 250)
 
+    def expire(self):
+        self.kill()
+        Drop.pool.append(self)
+
     def update(self, dt):
-        # movement
-        if self.moving:
-            self.pos += self.direction * self.speed * dt
-            self.rect.topleft = (round(self.pos.x), round(self.pos.y))
-        # timer
-        if pygame.time.get_ticks() - self.start_time >= self.lifetime:
-            self.kill()
+        # only moving drops are in the active group, floor splashes just wait for their expiry
+        distance = self.speed * dt
+        self.pos.x += self.direction.x * distance
+        self.pos.y += self.direction.y * distance
+        self.rect.x = round(self.pos.x)
+        self.rect.y = round(self.pos.y)
 
 
 class Rain:
-    def __init__(self, all_sprites):
+    def __init__(self, all_sprites, active_sprites, bounds, quality=RAIN_QUALITY):
         self.all_sprites = all_sprites
+        self.active_sprites = active_sprites
+        self.bounds = bounds  # the map, nothing spawns outside it
         self.rain_drops = import_folder('graphics/rain/drops/')
         self.rain_floor = import_folder('graphics/rain/floor/')
-        self.floor_w, self.floor_h = pygame.image.load('graphics/world/ground.png').get_size()
+        self.density = RAIN_DENSITY[quality]
+        # counters
+        self.floor_sprites = pygame.sprite.Group()
+        self.drop_sprites = pygame.sprite.Group()
+        self.floor_groups = (all_sprites, self.floor_sprites)
+        self.drop_groups = (all_sprites, active_sprites, self.drop_sprites)
+        self.floor_due = 0  # fractional spawns carried over between frames
+        self.drops_due = 0
+        self.spawned = 0
+
+    @property
+    def live(self):
+        return len(self.floor_sprites) + len(self.drop_sprites)
+
+    def spawn_area(self, view, travel=(0, 0)):
+        # view grown by the margin, plus the distance drops fall so they can still reach it
+        area = view.inflate(RAIN_MARGIN * 2, RAIN_MARGIN * 2)
+        area.width -= travel[0]
+        area.top -= travel[1]
+        area.height += travel[1]
+        return area.clip(self.bounds)
+
+    @staticmethod
+    def random_pos(area):
+        return randint(area.left, area.right), randint(area.top, area.bottom)
 
-    def create_floor(self):
-        Drop(
+    def create_floor(self, area):
+        Drop.spawn(
             surface=choice(self.rain_floor),
-            pos=(randint(0, self.floor_w), randint(0, self.floor_h)),
+            pos=self.random_pos(area),
             moving=False,
-            groups=self.all_sprites,
+            groups=self.floor_groups,
             z=LAYERS['rain-floor'])
 
-    def create_drops(self):
-        Drop(
+    def create_drops(self, area):
+        Drop.spawn(
             surface=choice(self.rain_drops),
-            pos=(randint(0, self.floor_w), randint(0, self.floor_h)),
+            pos=self.random_pos(area),
             moving=True,
-            groups=self.all_sprites,
+            groups=self.drop_groups,
             z=LAYERS['rain-drops'])
 
-    def update(self):
-        self.create_floor()
-        self.create_drops()
+    def update(self, dt, view):
+        floor_area = self.spawn_area(view)
+        drops_area = self.spawn_area(view, DROP_TRAVEL)
+        # spawn counts follow area and time, not frame rate or map size
+        self.floor_due += self.density * floor_area.width * floor_area.height / 1_000_000 * dt
+        self.drops_due += self.density * drops_area.width * drops_area.height / 1_000_000 * dt
+        while self.floor_due >= 1:
+            self.create_floor(floor_area)
+            self.floor_due -= 1
+            self.spawned += 1
+        while self.drops_due >= 1:
+            self.create_drops(drops_area)
+            self.drops_due -= 1
+            self.spawned += 1
@@ -1,8 +1,8 @@
 import pygame
 from settings import *
-from pytmx.util_pygame import load_pygame
 from support import *
 from random import choice
+from timer import scheduler
 
 
 class SoilTile(pygame.sprite.Sprite):
@@ -22,13 +22,14 @@ class WaterTile(pygame.sprite.Sprite):
 
 
 class Plant(pygame.sprite.Sprite):
-    def __init__(self, plant_type, groups, soil, check_watered):
+    def __init__(self, plant_type, groups, soil, cell):
         # setup
         super().__init__(groups)
         self.plant_type = plant_type
         self.frames = import_folder(f'graphics/fruit/{plant_type}')
         self.soil = soil
-        self.check_watered = check_watered
+        self.cell = cell  # the soil grid cell, 'W' in it while watered
+        self.growth = None  # scheduler entry of the next stage in realtime mode
         # plant growing attributes
         self.age = 0
         self.max_age = len(self.frames) - 1
@@ -37,50 +38,63 @@ class Plant(pygame.sprite.Sprite):
         # sprite setup
         self.image = self.frames[self.age]
         self.y_offset = -16 if plant_type is 'corn' else -8
-        self.rect = self.image.get_rect(midbottom=self.soil.rect.midbottom + pygame.math.Vector2(0, self.y_offset))
+        self.anchor = (self.soil.rect.centerx, self.soil.rect.bottom + self.y_offset)
+        self.rect = self.image.get_rect(midbottom=self.anchor)
         self.z = LAYERS['ground-plant']
 
-    def grow(self):
-        if self.check_watered(self.rect.center):
-            self.age += self.grow_speed
-
-            if int(self.age) > 0:
-                self.z = LAYERS['main']
-                self.hitbox = self.rect.copy().inflate(-26, -self.rect.height * 0.4)
-
-            if self.age >= self.max_age:
-                self.age = self.max_age
-                self.harvestable = True
-            self.image = self.frames[int(self.age)]
-            self.rect = self.image.get_rect(midbottom=self.soil.rect.midbottom + pygame.math.Vector2(0, self.y_offset))
+    def set_age(self, age):
+        stage = int(self.age)
+        self.age = min(age, self.max_age)
+        if self.age == self.max_age:
+            self.harvestable = True
+        if int(self.age) == stage:
+            return  # same frame as before, nothing to redraw
+
+        self.z = LAYERS['main']
+        self.hitbox = self.rect.copy().inflate(-26, -self.rect.height * 0.4)
+        self.image = self.frames[int(self.age)]
+        self.rect.size = self.image.get_size()
+        self.rect.midbottom = self.anchor
+
+    def schedule_growth(self):
+        # realtime mode: one scheduler entry, due when the next stage is reached; nothing runs in between
+        if self.growth is None and not self.harvestable:
+            delay = (int(self.age) + 1 - self.age) / self.grow_speed * GROWTH_STAGE_TIME
+            self.growth = scheduler.schedule(delay, self.grow_stage)
+
+    def grow_stage(self):
+        self.growth = None
+        if self.alive() and 'W' in self.cell:  # a plant that dried out waits until it is watered again
+            self.set_age(int(self.age) + 1)
+            self.schedule_growth()
 
 
 class SoilLayer:
-    def __init__(self, all_sprites, collision_sprites):
+    def __init__(self, all_sprites, collision_sprites, tmx_data, growth_mode=GROWTH_MODE):
         # sprite groups
         self.all_sprites = all_sprites
         self.collision_sprites = collision_sprites
         self.soil_sprites = pygame.sprite.Group()
         self.water_sprites = pygame.sprite.Group()
         self.plant_sprites = pygame.sprite.Group()
+        self.growth_mode = growth_mode
+        self.soil_tiles = {}  # (col, row) -> SoilTile
+        self.plants = {}  # (col, row) -> plant, so watering a cell can wake its plant
         # graphics
         self.soil_surfaces = import_folder_dict('graphics/soil/')
         self.water_surfaces = import_folder('graphics/soil_water/')
-        self.create_soil_grid()
+        self.create_soil_grid(tmx_data)
         self.create_hit_rects()
         # sound
-        self.hoe_sound = pygame.mixer.Sound('audio/hoe.wav')
-        self.hoe_sound.set_volume(0.1)
-        self.plant_sound = pygame.mixer.Sound('audio/plant.wav')
-        self.plant_sound.set_volume(0.2)
+        self.hoe_sound = load_sound('audio/hoe.wav', 0.1)
+        self.plant_sound = load_sound('audio/plant.wav', 0.2)
 
-    def create_soil_grid(self):
-        ground = pygame.image.load('graphics/world/ground.png')
-        h_tiles = ground.get_width() // TILE_SIZE
-        v_tiles = ground.get_height() // TILE_SIZE
+    def create_soil_grid(self, tmx_data):
+        h_tiles = tmx_data.width
+        v_tiles = tmx_data.height
 
         self.grid = [[[] for col in range(h_tiles)] for row in range(v_tiles)]
-        for x, y, _ in load_pygame('data/map.tmx').get_layer_by_name('Farmable').tiles():
+        for x, y, _ in tmx_data.get_layer_by_name('Farmable').tiles():
             self.grid[y][x].append('F')
 
     def create_hit_rects(self):
@@ -105,65 +119,83 @@ class SoilLayer:
                     if self.raining:
                         self.water_all()
 
-    def water(self, pos):
-        for soil_sprite in self.soil_sprites.sprites():
-            if soil_sprite.rect.collidepoint(pos):
-                x = soil_sprite.rect.x // TILE_SIZE
-                y = soil_sprite.rect.y // TILE_SIZE
-                self.grid[y][x].append('W')
+    @staticmethod
+    def cell_at(pos):
+        return int(pos[0] // TILE_SIZE), int(pos[1] // TILE_SIZE)
 
-                WaterTile(
-                    pos=soil_sprite.rect.topleft,
-                    surface=choice(self.water_surfaces),
-                    groups=[self.all_sprites, self.water_sprites])
+    def water(self, pos):
+        x, y = self.cell_at(pos)
+        if (x, y) in self.soil_tiles and 'W' not in self.grid[y][x]:  # watering twice would stack a second WaterTile
+            self.water_cell(x, y, choice(self.water_surfaces))
 
     def water_all(self):
         for index_row, row in enumerate(self.grid):
             for index_col, cell in enumerate(row):
                 if 'X' in cell and 'W' not in cell:
-                    x = index_col * TILE_SIZE
-                    y = index_row * TILE_SIZE
-                    cell.append('W')
-
-                    WaterTile(
-                        pos=(x, y),
-                        surface=choice(self.water_surfaces),
-                        groups=[self.all_sprites, self.water_sprites])
-
-    def remove_water(self):
-        for sprite in self.water_sprites.sprites():
-            sprite.kill()
-
-        for row in self.grid:
-            for cell in row:
-                if 'W' in cell:
-                    cell.remove('W')
-
-    def check_watered(self, pos):
-        x = pos[0] // TILE_SIZE
-        y = pos[1] // TILE_SIZE
-        cell = self.grid[y][x]
-        is_watered = 'W' in cell
-        return is_watered
+                    self.water_cell(index_col, index_row, choice(self.water_surfaces))
+
+    def water_cell(self, col, row, surface):
+        self.add_water_tile(col, row, surface)
+        self.wet_cell(col, row)
+
+    def add_water_tile(self, col, row, surface):
+        WaterTile(
+            pos=(col * TILE_SIZE, row * TILE_SIZE),
+            surface=surface,
+            groups=[self.all_sprites, self.water_sprites])
+
+    def wet_cell(self, col, row):
+        self.grid[row][col].append('W')
+        if self.growth_mode == 'realtime' and (col, row) in self.plants:
+            self.plants[col, row].schedule_growth()
+
+    def add_water_tiles(self, row, cols, surfaces):
+        for col, surface in zip(cols, surfaces):
+            self.add_water_tile(col, row, surface)
+
+    def wet_cells(self, rows):
+        for row, cols in rows:
+            for col in cols:
+                self.wet_cell(col, row)
+
+    @staticmethod
+    def dry_cells(cells):
+        for cell in cells:
+            cell.remove('W')
+
+    @staticmethod
+    def remove_water_tiles(tiles):
+        for tile in tiles:
+            tile.kill()
+
+    @staticmethod
+    def grow_plants(plants):
+        for plant in plants:
+            plant.set_age(plant.age + plant.grow_speed)
 
     def plant_seed(self, target_pos, seed):
         self.plant_sound.play()
-        for soil_sprite in self.soil_sprites.sprites():
-            if soil_sprite.rect.collidepoint(target_pos):
-                x = soil_sprite.rect.x // TILE_SIZE
-                y = soil_sprite.rect.y // TILE_SIZE
-                if 'P' not in self.grid[y][x]:
-                    self.grid[y][x].append('P')
-                    Plant(plant_type=seed, groups=[self.all_sprites, self.plant_sprites, self.collision_sprites],
+        x, y = self.cell_at(target_pos)
+        soil_sprite = self.soil_tiles.get((x, y))
+        if soil_sprite and 'P' not in self.grid[y][x]:
+            self.grid[y][x].append('P')
+            plant = Plant(plant_type=seed, groups=[self.all_sprites, self.plant_sprites, self.collision_sprites],
                           soil=soil_sprite,
-                          check_watered=self.check_watered)
+                          cell=self.grid[y][x])
+            self.plants[x, y] = plant
+            if self.growth_mode == 'realtime' and 'W' in self.grid[y][x]:
+                plant.schedule_growth()
 
-    def update_plants(self):
-        for plant in self.plant_sprites.sprites():
-            plant.grow()
+    def remove_plant(self, plant):
+        col = plant.soil.rect.x // TILE_SIZE
+        row = plant.soil.rect.y // TILE_SIZE
+        self.grid[row][col].remove('P')
+        del self.plants[col, row]
 
     def create_soil_tiles(self):
-        self.soil_sprites.empty()
+        for sprite in self.soil_sprites.sprites():
+            sprite.kill()  # empty() would leave the old tiles in all_sprites
+        self.soil_tiles.clear()
         for index_row, row in enumerate(self.grid):
             for index_col, cell in enumerate(row):
                 if 'X' in cell:
@@ -220,7 +252,7 @@ class SoilLayer:
 
                     x = index_col * TILE_SIZE
                     y = index_row * TILE_SIZE
-                    SoilTile(
+                    self.soil_tiles[index_col, index_row] = SoilTile(
                         pos=(x, y),
                         surface=self.soil_surfaces[tile_type],
                         groups=[self.all_sprites, self.soil_sprites])
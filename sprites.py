@@ -1,7 +1,34 @@
 import pygame
 from settings import *
-from random import randint, choice
-from timer import Timer
+import random
+from random import choice
+from timer import Timer, scheduler
+from weakref import WeakKeyDictionary
+from telemetry import telemetry
+from support import load_image, load_sound
+
+# white-flash surfaces keyed by the surface they were built from
+silhouettes = WeakKeyDictionary()
+
+
+def get_silhouette(surface):
+    silhouette = silhouettes.get(surface)
+    if silhouette is None:
+        silhouette = telemetry.track(pygame.mask.from_surface(surface).to_surface(), 'sprites.silhouette')
+        silhouette.set_colorkey((0, 0, 0))
+        silhouettes[surface] = silhouette
+    return silhouette
+
+
+class StaticTile:
+    # drawn by the camera but never updated or collided with, so no Sprite bookkeeping
+    __slots__ = ('image', 'rect', 'z')
+
+    def __init__(self, pos, surface, camera, z=LAYERS['main']):
+        self.image = surface
+        self.rect = surface.get_rect(topleft=pos)
+        self.z = z
+        camera.static_tiles.append(self)
 
 
 class Generic(pygame.sprite.Sprite):
@@ -15,28 +42,37 @@ class Generic(pygame.sprite.Sprite):
 
 class Interaction(Generic):
     def __init__(self, pos, size, groups, name):
-        surface = pygame.Surface(size)
+        surface = telemetry.track(pygame.Surface(size), 'sprites.interaction')
         super().__init__(surface=surface, pos=pos, groups=groups)
         self.name = name
 
 
-class Water(Generic):
-    def __init__(self, pos, frames, groups):
-        # animation setup
+class SharedAnimation:
+    # one frame index for a whole set of sprites, advanced once per frame by the level that owns it
+    def __init__(self, frames):
         self.frames = frames
         self.frame_index = 0
 
-        # sprite setup
-        super().__init__(pos=pos, surface=self.frames[self.frame_index], groups=groups, z=LAYERS['water'])
+    @property
+    def image(self):
+        return self.frames[int(self.frame_index)]
 
     def animate(self, dt):
         self.frame_index += 5 * dt
         if self.frame_index >= len(self.frames):
             self.frame_index = 0
-        self.image = self.frames[int(self.frame_index)]
 
-    def update(self, dt):
-        self.animate(dt)
+
+class Water(pygame.sprite.Sprite):
+    def __init__(self, pos, animation, groups):
+        super().__init__(groups)
+        self.animation = animation  # every tile shows the same frame
+        self.rect = animation.frames[0].get_rect(topleft=pos)
+        self.z = LAYERS['water']
+
+    @property
+    def image(self):
+        return self.animation.image
 
 
 class WildFlower(Generic):
@@ -46,32 +82,43 @@ class WildFlower(Generic):
 
 
 class Particle(Generic):
+    pool = []  # expired particles waiting to be reused
+
     def __init__(self, pos, surface, groups, z, duration=200):
         super().__init__(pos, surface, groups, z)
-        self.start_time = pygame.time.get_ticks()
-        self.duration = duration
-
-        mask_surface = pygame.mask.from_surface(surface)
-        new_surface = mask_surface.to_surface()
-        new_surface.set_colorkey((0, 0, 0))
-        self.image = new_surface
+        self.setup(pos, surface, z, duration)
+
+    @classmethod
+    def spawn(cls, pos, surface, groups, z, duration=200):
+        if not cls.pool:
+            return cls(pos, surface, groups, z, duration)
+        particle = cls.pool.pop()
+        particle.setup(pos, surface, z, duration)
+        particle.add(groups)
+        return particle
+
+    def setup(self, pos, surface, z, duration):
+        self.image = get_silhouette(surface)
+        self.rect = self.image.get_rect(topleft=pos)
+        self.z = z
+        scheduler.schedule(duration, self.expire)
 
-    def update(self, dt):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.start_time > self.duration:
-            self.kill()
+    def expire(self):
+        self.kill()
+        Particle.pool.append(self)
 
 
 class Tree(Generic):
     def __init__(self, pos, surface, groups, name, player_add):
         super().__init__(pos, surface, groups)
+        self.all_sprites = groups[0]  # Sprite.groups() is unordered
         # tree attributes
         self.health = 5
         self.alive = True
         stump_path = f'graphics/stumps/{"small" if name == "Small" else "large"}.png'
-        self.stump_surface = pygame.image.load(stump_path).convert_alpha()
+        self.stump_surface = load_image(stump_path)
         # apples
-        self.apple_surface = pygame.image.load('graphics/fruit/apple.png')
+        self.apple_surface = load_image('graphics/fruit/apple.png')
         self.apple_pos = APPLE_POS[name]
         self.apple_sprites = pygame.sprite.Group()
         self.create_fruit()
@@ -79,7 +126,7 @@ class Tree(Generic):
         self.player_add = player_add
 
         # sounds
-        self.axe_sound = pygame.mixer.Sound('audio/axe.mp3')
+        self.axe_sound = load_sound('audio/axe.mp3')  # one decode shared by every tree
 
     def damage(self):
         self.health -= 1
@@ -88,29 +135,33 @@ class Tree(Generic):
 
         if len(self.apple_sprites.sprites()) > 0:
             random_apple = choice(self.apple_sprites.sprites())
-            Particle(pos=random_apple.rect.topleft, surface=random_apple.image, groups=self.groups()[0],
-                     z=LAYERS['fruit'])
+            Particle.spawn(pos=random_apple.rect.topleft, surface=random_apple.image, groups=self.all_sprites,
+                           z=LAYERS['fruit'])
             self.player_add('apple')
             random_apple.kill()
 
+        self.check_death()  # health only changes here, so there is nothing to poll per frame
+
     def check_death(self):
-        if self.health <= 0:
-            Particle(pos=self.rect.topleft, surface=self.image, groups=self.groups()[0], z=LAYERS['fruit'],
-                     duration=300)
+        if self.alive and self.health <= 0:
+            Particle.spawn(pos=self.rect.topleft, surface=self.image, groups=self.all_sprites, z=LAYERS['fruit'],
+                           duration=300)
             self.image = self.stump_surface
             self.rect = self.image.get_rect(midbottom=self.rect.midbottom)
             self.hitbox = self.rect.copy().inflate((-10, -self.rect.height * 0.6))
             self.alive = False
             self.player_add('wood')
 
-    def update(self, dt):
-        if self.alive:
-            self.check_death()
-
-    def create_fruit(self):
-        for pos in self.apple_pos:
-            if randint(0, 10) < 2:
-                x = self.rect.left + pos[0]
-                y = self.rect.top + pos[1]
-                # self.groups()[0] is 'all sprites'
-                Generic((x, y), self.apple_surface, [self.apple_sprites, self.groups()[0]], LAYERS['fruit'])
+    def create_fruit(self, rng=random):
+        self.grow_fruit(self.plan_fruit(rng))
+
+    def plan_fruit(self, rng):
+        return [pos for pos in self.apple_pos if rng.randint(0, 10) < 2]
+
+    def grow_fruit(self, positions):
+        for apple in self.apple_sprites.sprites():
+            apple.kill()
+        for pos in positions:
+            x = self.rect.left + pos[0]
+            y = self.rect.top + pos[1]
+            Generic((x, y), self.apple_surface, [self.apple_sprites, self.all_sprites], LAYERS['fruit'])
@@ -0,0 +1,45 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class StartupReport:
+    # times startup phases exclusively: time spent in a nested phase is not counted again in its parent
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.totals = defaultdict(float)
+        self.stack = []  # [name, time the phase last started or resumed]
+        self.enabled = False
+        self.first_frame_time = None
+
+    @contextmanager
+    def phase(self, name):
+        now = time.perf_counter()
+        if self.stack:
+            self.totals[self.stack[-1][0]] += now - self.stack[-1][1]
+        self.stack.append([name, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            name, started = self.stack.pop()
+            self.totals[name] += now - started
+            if self.stack:
+                self.stack[-1][1] = now
+
+    def first_frame(self):
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - self.start
+            if self.enabled:
+                self.report()
+
+    def report(self):
+        print('startup phases:')
+        for name, seconds in sorted(self.totals.items(), key=lambda item: -item[1]):
+            print(f'  {name:16} {seconds * 1000:8.1f} ms')
+        other = self.first_frame_time - sum(self.totals.values())
+        print(f'  {"other":16} {other * 1000:8.1f} ms')
+        print(f'time to first frame: {self.first_frame_time * 1000:.1f} ms')
+
+
+startup = StartupReport()
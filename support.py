@@ -1,5 +1,35 @@
 import pygame
 from os import walk
+from os.path import normpath
+from atlas import atlas
+from telemetry import telemetry
+from startup import startup
+
+images = {}  # path -> surface, shared by everything that loads the same file
+sounds = {}  # path -> Sound, likewise
+
+
+def load_image(path):
+    # atlas subsurface when the file is packed, otherwise a converted surface loaded once
+    path = normpath(path)
+    surface = atlas.get(path)
+    if surface is None:
+        surface = images.get(path)
+        if surface is None:
+            with startup.phase('asset decode'):
+                surface = telemetry.track(pygame.image.load(path).convert_alpha(), path)
+            images[path] = surface
+    return surface
+
+
+def load_sound(path, volume=1):
+    sound = sounds.get(path)
+    if sound is None:
+        with startup.phase('audio'):
+            sound = pygame.mixer.Sound(path)
+        sound.set_volume(volume)
+        sounds[path] = sound
+    return sound
 
 
 def import_folder(path):
@@ -9,7 +39,7 @@ def import_folder(path):
         img_files.sort()
         for image in img_files:
             full_path = path + '/' + image
-            image_surface = pygame.image.load(full_path).convert_alpha()
+            image_surface = load_image(full_path)
             surface_list.append(image_surface)
 
     return surface_list
@@ -22,7 +52,7 @@ def import_folder_dict(path):
         img_files.sort()
         for image in img_files:
             full_path = path + '/' + image
-            image_surface = pygame.image.load(full_path).convert_alpha()
+            image_surface = load_image(full_path)
             surface_dict[image.split('.')[0]] = image_surface
 
     return surface_dict
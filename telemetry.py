@@ -0,0 +1,99 @@
+import json
+import sys
+from collections import Counter, defaultdict
+from weakref import finalize
+
+# sprite classes that come and go within seconds and say nothing about leaks
+TRANSIENT_CLASSES = {'Drop', 'Particle'}
+# world state re-rolled every day from surfaces that are already loaded
+REROLLED_STATE = {'apples', 'watered'}
+# surfaces held by caches that fill up as things are first drawn, once or up to a size cap, and the camera's
+# render target, which is reallocated whenever --render-scale auto steps; none of that is a leak
+CACHED_ORIGINS = {'camera.mip', 'sprites.silhouette', 'menu.text',  # the menu is built on first use
+                  'camera.world_surface'}
+
+
+class MemoryTelemetry:
+    def __init__(self):
+        self.surface_bytes = defaultdict(int)  # live pixel bytes by origin (asset path or creating site)
+        self.surface_counts = defaultdict(int)
+        self.samples = []
+
+    def track(self, surface, origin):
+        size = surface.get_pitch() * surface.get_height()
+        self.surface_bytes[origin] += size
+        self.surface_counts[origin] += 1
+        finalize(surface, self.release, origin, size)  # must not reference the surface itself
+        return surface
+
+    def new_series(self):
+        # a new level starts over at day 0, its samples are not compared with the last level's
+        self.samples = []
+
+    def release(self, origin, size):
+        self.surface_bytes[origin] -= size
+        self.surface_counts[origin] -= 1
+
+    def sample(self, day, groups, classes, world):
+        # groups: name -> sprite count, classes: sprite class -> count, world: name -> world state count
+        sample = {
+            'day': day,
+            'surface_bytes': {origin: size for origin, size in self.surface_bytes.items() if size},
+            'surface_counts': {origin: count for origin, count in self.surface_counts.items() if count},
+            'groups': groups,
+            'classes': dict(classes),
+            'world': world,
+        }
+        sample['warnings'] = self.check(sample)
+        self.samples.append(sample)
+        for warning in sample['warnings']:
+            print(f'telemetry: {warning}', file=sys.stderr)
+        return sample
+
+    def check(self, sample):
+        warnings = []
+        # sprites that mirror a grid flag must never outnumber it
+        for sprite_class, flag in (('SoilTile', 'tilled'), ('WaterTile', 'watered'), ('Plant', 'planted')):
+            if sample['classes'].get(sprite_class, 0) > sample['world'][flag]:
+                warnings.append(f"{sample['classes'][sprite_class]} {sprite_class} sprites for "
+                                f"{sample['world'][flag]} {flag} cells")
+        # every lasting sprite stands for one piece of world state, so they have to grow together
+        if self.samples:
+            previous = self.samples[-1]
+            world_growth = sum(sample['world'].values()) - sum(previous['world'].values())
+            sprite_growth = self.lasting_sprites(sample) - self.lasting_sprites(previous)
+            if sprite_growth > max(world_growth, 0):
+                warnings.append(f'{sprite_growth} more sprites since day {previous["day"]} '
+                                f'but world state grew by {world_growth}')
+            byte_growth = self.uncached_bytes(sample) - self.uncached_bytes(previous)
+            if byte_growth > 0 and self.lasting_state(sample) <= self.lasting_state(previous):
+                warnings.append(f'{byte_growth} more surface bytes since day {previous["day"]} '
+                                f'with no growth in world state')
+        return warnings
+
+    @staticmethod
+    def lasting_state(sample):
+        return sum(count for name, count in sample['world'].items() if name not in REROLLED_STATE)
+
+    @staticmethod
+    def uncached_bytes(sample):
+        return sum(size for origin, size in sample['surface_bytes'].items() if origin not in CACHED_ORIGINS)
+
+    @staticmethod
+    def lasting_sprites(sample):
+        return sum(count for name, count in sample['classes'].items() if name not in TRANSIENT_CLASSES)
+
+    def total_bytes(self):
+        return sum(self.surface_bytes.values())
+
+    def export(self, path):
+        with open(path, 'w') as file:
+            json.dump({'total_surface_bytes': self.total_bytes(), 'samples': self.samples}, file, indent=1)
+
+
+telemetry = MemoryTelemetry()
+
+
+def count_classes(sprites):
+    # counted by class first, without a Python-level loop, as this runs at the darkest frame of a sleep
+    return Counter({cls.__name__: count for cls, count in Counter(map(type, sprites)).items()})
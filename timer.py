@@ -1,25 +1,58 @@
-import pygame
 from settings import *
+from heapq import heappush, heappop
+from itertools import count
+
+
+class Scheduler:
+    def __init__(self):
+        self.time = 0  # ms of game time, advanced once per frame
+        self.queue = []  # heap of [due time, sequence, callback]
+        self.sequence = count()  # breaks ties so callbacks fire in the order they were scheduled
+
+    def schedule(self, delay, func):
+        entry = [self.time + delay, next(self.sequence), func]
+        heappush(self.queue, entry)
+        return entry
+
+    def cancel(self, entry):
+        entry[2] = None  # dropped when it reaches the top of the heap
+
+    def clear(self):
+        self.time = 0
+        self.queue.clear()
+
+    def update(self, dt):
+        self.time += dt * 1000
+        while self.queue and self.queue[0][0] <= self.time:
+            func = heappop(self.queue)[2]
+            if func:
+                func()
+
+
+scheduler = Scheduler()
 
 
 class Timer:
     def __init__(self, duration, func=None):
         self.duration = duration
         self.func = func
-        self.start_time = 0
+        self.entry = None
         self.active = False
 
     def activate(self):
+        if self.entry:
+            scheduler.cancel(self.entry)
         self.active = True
-        self.start_time = pygame.time.get_ticks()
+        self.entry = scheduler.schedule(self.duration, self.timeout)
 
     def deactivate(self):
+        if self.entry:
+            scheduler.cancel(self.entry)
+        self.active = False
+        self.entry = None
+
+    def timeout(self):
+        self.entry = None
         self.active = False
-        self.start_time = 0
-
-    def update(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.start_time >= self.duration:  # timeout
-            if self.func and self.start_time != 0:
-                self.func()
-            self.deactivate()
+        if self.func:
+            self.func()
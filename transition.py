@@ -1,20 +1,27 @@
 import pygame
 from settings import *
+from telemetry import telemetry
 
 
 class Transition:
-    def __init__(self, reset, player):
+    def __init__(self, rollover, reset, wake, player):
         # setup
         self.display_surface = pygame.display.get_surface()
+        self.rollover = rollover
         self.reset = reset
+        self.wake = wake
         self.player = player
         # overlay image
-        self.image = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert_alpha()
+        self.image = telemetry.track(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert_alpha(), 'transition.image')
         self.color = 255
         self.speed = -2
 
     def play(self):
+        if self.color == 255 and self.speed < 0:  # fade begins, plan the next day in the background
+            self.rollover.start()
         self.color += self.speed
+        if self.speed < 0:
+            self.rollover.step(self.color / -self.speed)  # frames until the darkest one
         if self.color <= 0:
             self.speed *= -1
             self.color = 0
@@ -23,6 +30,7 @@ class Transition:
             self.color = 255
             self.player.sleep = False
             self.speed = -2
+            self.wake()
 
         self.image.fill((self.color, self.color, self.color))
         self.display_surface.blit(self.image, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)